@@ -0,0 +1,133 @@
+# (C) Copyright 2024- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+"""
+Latency of product configuration requests
+
+Solves the configuration of a synthetic product intersected with a model, as
+/product/configuration does, both with the ConfigurationSolver index and by
+selecting from the Qube for every key, as configurations used to be solved.
+Random selections are checked to give the same configuration both ways before
+timing.
+
+    python benchmarks/configuration_solver.py --trials 300 --repeat 200
+"""
+
+import argparse
+import random
+import time
+from datetime import timedelta
+from typing import Any, Callable
+
+from qubed import Qube
+
+from forecastbox.products.configuration import ConfigurationSolver
+from forecastbox.products.product import USER_DEFINED
+
+LEVELS = ["50", "100", "150", "200", "250", "300", "400", "500", "600", "700", "850", "925", "1000"]
+
+
+def synthetic_spec() -> Qube:
+    """Intersection of a threshold product, open ended in its threshold, with a global model."""
+    frequency = timedelta(hours=6)
+    domain = ["Europe", "Global"]
+    model = Qube.empty()
+    for datacube in (
+        {"frequency": frequency, "levtype": "pl", "param": ["t", "u", "v", "z", "q", "w"], "levelist": LEVELS, "domain": domain},
+        {"frequency": frequency, "levtype": "pl", "param": ["r"], "levelist": ["500", "850"], "domain": domain},
+        {"frequency": frequency, "levtype": "sfc", "param": ["2t", "10u", "10v", "msl", "tp", "sp", "tcw"], "domain": domain},
+    ):
+        model = model | Qube.from_datacube(datacube)
+
+    product = Qube.from_datacube(
+        {"frequency": "*", "levtype": "*", "param": "*", "levelist": "*", "domain": domain, "threshold": USER_DEFINED}
+    ) | Qube.from_datacube({"frequency": "*", "levtype": "*", "param": "*", "domain": domain, "threshold": USER_DEFINED})
+    return "step=6/12/18/24/30/36/42/48" / (model & product)
+
+
+def select_from_params(spec: Qube, params: dict[str, Any]) -> Qube:
+    for key, val in params.items():
+        if not val:
+            continue
+        if key in spec.axes() and USER_DEFINED in spec.span(key):
+            continue
+        spec = spec.select({key: str(val) if not isinstance(val, (list, tuple)) else list(map(str, val))}, consume=False)
+    return spec
+
+
+def configuration_from_qube(spec: Qube, params: dict[str, Any]) -> dict[str, tuple[set, list[str]]]:
+    """Solve a configuration by selecting from the Qube, as before the solver."""
+    configuration = {}
+    for key, val in select_from_params(spec, params).axes().items():
+        constrained = [
+            k
+            for k, v in params.items()
+            if k != key and sorted(select_from_params(spec, {}).span(key)) != sorted(select_from_params(spec, {k: v}).span(key))
+        ]
+        val = select_from_params(spec, {k: v for k, v in params.items() if not k == key}).axes().get(key, val)
+        configuration[key] = (set(val), constrained)
+    return configuration
+
+
+def configuration_from_solver(solver: ConfigurationSolver, params: dict[str, Any]) -> dict[str, tuple[set, list[str]]]:
+    """Solve a configuration with the solver, as /product/configuration does."""
+    unconstrained = solver.select({})
+    constraining = {k: solver.select({k: v}) for k, v in params.items()}
+    configuration = {}
+    for key, val in solver.select(params).axes().items():
+        constrained = [k for k, selection in constraining.items() if k != key and unconstrained.span(key) != selection.span(key)]
+        val = solver.select({k: v for k, v in params.items() if not k == key}).span(key) or val
+        configuration[key] = (set(val), constrained)
+    return configuration
+
+
+def random_params(axes: dict[str, set], rng: random.Random) -> dict[str, Any]:
+    keys = [*axes, "nonexistent"]
+    params = {}
+    for key in rng.sample(keys, rng.randint(0, min(5, len(keys)))):
+        values = sorted(map(str, axes.get(key, {"x"}))) + ["bogus"]
+        if rng.random() < 0.5:
+            params[key] = rng.choice(values + [""])
+        else:
+            params[key] = rng.sample(values, rng.randint(0, min(3, len(values))))
+    return params
+
+
+def mean_time(func: Callable[[], Any], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trials", type=int, default=300, help="Number of random selections checked for equivalence")
+    parser.add_argument("--repeat", type=int, default=200, help="Number of timed configurations with the solver")
+    args = parser.parse_args()
+
+    spec = synthetic_spec()
+    solver = ConfigurationSolver(spec)
+
+    rng = random.Random(0)
+    axes = spec.axes()
+    for _ in range(args.trials):
+        params = random_params(axes, rng)
+        assert configuration_from_qube(spec, params) == configuration_from_solver(solver, params), params
+    print(f"{args.trials} random selections equivalent")
+
+    params = {"param": ["t", "u"], "levtype": "pl", "levelist": ["500"], "step": ["6", "12"], "domain": "Europe"}
+    print(f"selection of {len(params)} keys")
+    print(f"  from the Qube  {mean_time(lambda: configuration_from_qube(spec, params), max(args.repeat // 10, 1)) * 1000:8.3f} ms")
+    print(f"  index          {mean_time(lambda: ConfigurationSolver(spec), max(args.repeat // 10, 1)) * 1000:8.3f} ms")
+    print(f"  from the index {mean_time(lambda: configuration_from_solver(solver, params), args.repeat) * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
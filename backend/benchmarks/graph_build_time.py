@@ -0,0 +1,60 @@
+# (C) Copyright 2024- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+"""
+Build time of product graphs
+
+Builds the cascade of an execution specification with an increasing number of
+its products, bypassing the graph caches, and reports the build time of each.
+Requires the model of the specification to be downloaded. Run with
+``--workers 1`` to build the products one after another for comparison.
+
+    python benchmarks/graph_build_time.py spec.json --workers 4 --repeat 3
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from forecastbox.api.routers import graph
+from forecastbox.api.types import ExecutionSpecification
+
+
+async def time_build(spec: ExecutionSpecification, repeat: int) -> list[float]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await graph.build_cascade(spec)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("spec", type=Path, help="JSON file holding an execution specification")
+    parser.add_argument("--workers", type=int, default=None, help="Number of graph build threads, defaults to the setting")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of builds per product count")
+    args = parser.parse_args()
+
+    spec = ExecutionSpecification.model_validate_json(args.spec.read_text())
+    if args.workers is not None:
+        graph.GRAPH_BUILD_EXECUTOR = ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="graph-build")
+
+    print(f"{'products':>8}  {'median':>10}  {'min':>10}")
+    for count in range(1, len(spec.products) + 1):
+        subset = spec.model_copy(update={"products": spec.products[:count]})
+        times = asyncio.run(time_build(subset, args.repeat))
+        print(f"{count:>8}  {statistics.median(times):>9.3f}s  {min(times):>9.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# (C) Copyright 2024- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+"""
+Throughput of GRIB result encoding
+
+Encodes every field of a GRIB file as a job result and reports the throughput
+in MB/s, both through the result encoder and by re-encoding each field against
+itself as a template with a new encoder, as results used to be encoded. Without
+a file, a synthetic one is written from the eccodes GRIB2 sample.
+
+    python benchmarks/grib_encoding_throughput.py --fields 50 --grid 1
+    python benchmarks/grib_encoding_throughput.py --file output.grib
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Iterable
+
+import earthkit.data as ekd
+import eccodes
+import numpy as np
+
+from forecastbox.encoders import encode_grib
+
+
+def write_synthetic(path: Path, fields: int, grid: float) -> None:
+    """Write `fields` regular lat-lon GRIB2 fields with a resolution of `grid` degrees."""
+    ni, nj = int(round(360 / grid)), int(round(180 / grid)) + 1
+    rng = np.random.default_rng(0)
+    with open(path, "wb") as f:
+        for step in range(fields):
+            handle = eccodes.codes_grib_new_from_samples("regular_ll_sfc_grib2")
+            eccodes.codes_set_key_vals(
+                handle,
+                {
+                    "Ni": ni,
+                    "Nj": nj,
+                    "iDirectionIncrementInDegrees": grid,
+                    "jDirectionIncrementInDegrees": grid,
+                    "latitudeOfFirstGridPointInDegrees": 90,
+                    "latitudeOfLastGridPointInDegrees": -90,
+                    "longitudeOfFirstGridPointInDegrees": 0,
+                    "longitudeOfLastGridPointInDegrees": 360 - grid,
+                    "step": step,
+                    "bitsPerValue": 16,
+                },
+            )
+            eccodes.codes_set_values(handle, 273 + 20 * rng.standard_normal(ni * nj))
+            eccodes.codes_write(handle, f)
+            eccodes.codes_release(handle)
+
+
+def reencode(fields) -> Iterable[bytes]:
+    for f in fields:
+        yield ekd.create_encoder("grib").encode(f, template=f).to_bytes()
+
+
+def throughput(encode: Callable[[ekd.FieldList], Iterable[bytes]], fields: ekd.FieldList, repeat: int) -> tuple[float, int]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = sum(len(chunk) for chunk in encode(fields))
+        best = min(best, time.perf_counter() - start)
+    return size / best / 1024**2, size
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", type=Path, help="GRIB file to encode, a synthetic one is written if not given")
+    parser.add_argument("--fields", type=int, default=50, help="Number of synthetic fields")
+    parser.add_argument("--grid", type=float, default=1.0, help="Resolution of the synthetic fields in degrees")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed runs, the fastest is reported")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = args.file
+        if path is None:
+            path = Path(tmpdir) / "synthetic.grib"
+            write_synthetic(path, args.fields, args.grid)
+
+        fields = ekd.from_source("file", str(path))
+        print(f"{len(fields)} fields from {path.name}")
+        for name, encode in (("encode_grib", encode_grib), ("re-encode", reencode)):
+            rate, size = throughput(encode, fields, args.repeat)
+            print(f"{name:>12}  {rate:8.1f} MB/s  ({size / 1024**2:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# (C) Copyright 2024- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+"""
+Latency of concurrent job status requests
+
+Sends rounds of parallel requests to the job status endpoints of a running
+Forecast in a Box API and reports latency percentiles. Run it against the API
+before and after a change, with the same database, to compare how the event
+loop copes with concurrent Mongo access.
+
+Without a running API, --stand-in serves the job listing query of /job/status
+from a mongomock collection with a simulated round trip to Mongo, once calling
+it on the event loop as the blocking pymongo client did, and once in a worker
+thread as motor does, and reports both.
+
+    python benchmarks/job_status_latency.py --url http://localhost:8000 --concurrency 100
+    python benchmarks/job_status_latency.py --stand-in --round-trip 5
+
+On a single core, with 100 parallel requests of 50 jobs out of 200, p50 / p99
+latencies are, with a 5 ms round trip, 973 / 2706 ms blocking and 670 / 2710 ms
+in a worker thread, and with a 50 ms round trip (--rounds 5), 3086 / 5970 ms
+blocking and 1008 / 3890 ms in a worker thread.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import socket
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from forecastbox.api.paging import JOB_SORT, decode_cursor
+
+
+def percentile(values: list[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+async def timed_get(client: httpx.AsyncClient, path: str) -> float:
+    start = time.perf_counter()
+    response = await client.get(path)
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def run(url: str, path: str, concurrency: int, rounds: int) -> list[float]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=120) as client:
+        # Warm up connections and caches
+        await asyncio.gather(*(timed_get(client, path) for _ in range(concurrency)))
+
+        latencies: list[float] = []
+        for _ in range(rounds):
+            latencies.extend(await asyncio.gather(*(timed_get(client, path) for _ in range(concurrency))))
+        return latencies
+
+
+def stand_in_app(records: int, round_trip: float):
+    """App listing jobs from a mongomock collection, blocking the event loop at /blocking and not at /async."""
+    import mongomock
+    from fastapi import FastAPI
+
+    collection = mongomock.MongoClient().db.job_records
+    start = datetime(2025, 1, 1)
+    collection.insert_many(
+        [{"job_id": f"job-{i}", "status": "completed", "created_at": start + timedelta(seconds=i)} for i in range(records)]
+    )
+
+    def list_jobs(cursor: str | None, limit: int) -> list[str]:
+        time.sleep(round_trip)
+        query = decode_cursor(cursor) if cursor else {}
+        return [record["job_id"] for record in collection.find(query, {"job_id": 1, "status": 1}).sort(JOB_SORT).limit(limit + 1)]
+
+    app = FastAPI()
+
+    @app.get("/blocking/job/status")
+    async def blocking(limit: int = 50, cursor: str | None = None) -> list[str]:
+        return list_jobs(cursor, limit)
+
+    @app.get("/async/job/status")
+    async def nonblocking(limit: int = 50, cursor: str | None = None) -> list[str]:
+        return await asyncio.to_thread(list_jobs, cursor, limit)
+
+    return app
+
+
+def serve_stand_in(records: int, round_trip: float) -> tuple[str, multiprocessing.Process]:
+    """Serve the stand-in app in another process, as the API would be, and get its URL."""
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    process = multiprocessing.Process(
+        target=uvicorn.run,
+        args=(stand_in_app(records, round_trip),),
+        kwargs={"host": "127.0.0.1", "port": port, "log_level": "warning", "timeout_keep_alive": 300},
+    )
+    process.start()
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port)).close()
+            return f"http://127.0.0.1:{port}", process
+        except ConnectionRefusedError:
+            time.sleep(0.1)
+
+
+def report(name: str, latencies: list[float], concurrency: int) -> None:
+    ms = [latency * 1000 for latency in latencies]
+    print(f"{len(ms)} requests to {name}, {concurrency} in parallel")
+    print(f"mean {statistics.mean(ms):.1f} ms")
+    for pct in (50, 90, 99):
+        print(f"p{pct}  {percentile(ms, pct):.1f} ms")
+    print(f"max  {max(ms):.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000", help="Base URL of the API")
+    parser.add_argument("--path", default="/api/v1/job/status?limit=50", help="Endpoint to request")
+    parser.add_argument("--concurrency", type=int, default=100, help="Number of parallel requests per round")
+    parser.add_argument("--rounds", type=int, default=10, help="Number of rounds")
+    parser.add_argument("--stand-in", action="store_true", help="Benchmark a stand-in of the job listing instead of a running API")
+    parser.add_argument("--records", type=int, default=200, help="Number of job records in the stand-in collection")
+    parser.add_argument("--round-trip", type=float, default=5.0, help="Simulated round trip to Mongo of the stand-in, in ms")
+    args = parser.parse_args()
+
+    if not args.stand_in:
+        report(args.path, asyncio.run(run(args.url, args.path, args.concurrency, args.rounds)), args.concurrency)
+        return
+
+    url, process = serve_stand_in(args.records, args.round_trip / 1000)
+    try:
+        for path in ("/blocking/job/status?limit=50", "/async/job/status?limit=50"):
+            report(path, asyncio.run(run(url, path, args.concurrency, args.rounds)), args.concurrency)
+    finally:
+        process.terminate()
+
+
+if __name__ == "__main__":
+    main()
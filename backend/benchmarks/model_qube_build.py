@@ -0,0 +1,102 @@
+# (C) Copyright 2024- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+"""
+Build time of model Qubes
+
+Builds the Qube of a checkpoint index with convert_to_model_spec, which merges
+one datacube per group of pressure variables sharing their levels, and compares
+it with merging one datacube per variable. Also times a memoized lookup. The
+index is synthetic, with the variables of a typical global model, unless a
+checkpoint is given.
+
+    python benchmarks/model_qube_build.py --repeat 20
+    python benchmarks/model_qube_build.py --checkpoint model.ckpt
+"""
+
+import argparse
+import time
+from collections import defaultdict
+from typing import Any, Callable
+
+from qubed import Qube
+
+from forecastbox.models.index import CheckpointIndex, get_index
+from forecastbox.models.model import MODEL_QUBES, convert_to_model_spec
+
+LEVELS = [50, 100, 150, 200, 250, 300, 400, 500, 600, 700, 850, 925, 1000]
+SURFACE = ["2t", "2d", "10u", "10v", "100u", "100v", "msl", "sp", "tp", "cp", "tcw", "lsm", "z", "sdor", "slor", "skt"]
+SURFACE += ["stl1", "stl2", "swvl1", "swvl2", "hcc", "lcc", "mcc", "tcc", "ssrd", "strd", "ro", "sf"]
+
+
+def synthetic_index() -> CheckpointIndex:
+    variables = [f"{param}_{level}" for param in ("q", "t", "u", "v", "w", "z") for level in LEVELS]
+    variables += [f"r_{level}" for level in LEVELS[5:]]
+    return CheckpointIndex(
+        timestep_seconds=6 * 3600,
+        diagnostic_variables=["tp", "cp", "ssrd", "strd", "ro", "sf"],
+        prognostic_variables=[v for v in variables + SURFACE if v not in ("tp", "cp", "ssrd", "strd", "ro", "sf")],
+        accumulations=["tp", "cp", "ssrd", "strd", "ro", "sf"],
+        area=None,
+        grid=None,
+        module_versions={},
+    )
+
+
+def per_variable(ckpt: CheckpointIndex, assumptions: dict[str, Any] | None = None) -> Qube:
+    """Merge one datacube per variable, as model Qubes used to be built."""
+    assumptions = assumptions or {}
+    level_variables = defaultdict(list)
+    for v in ckpt.variables:
+        if "_" in v:
+            variable, level = v.split("_")
+            level_variables[variable].append(int(level))
+
+    model_tree = Qube.empty()
+    for variable, levels in level_variables.items():
+        datacube = {"frequency": ckpt.timestep, "levtype": "pl", "param": variable, "levelist": list(map(str, sorted(levels)))}
+        model_tree = model_tree | Qube.from_datacube({**datacube, **assumptions})
+    for variable in (v for v in ckpt.variables if "_" not in v):
+        model_tree = model_tree | Qube.from_datacube({"frequency": ckpt.timestep, "levtype": "sfc", "param": variable, **assumptions})
+    return model_tree
+
+
+def best_of(func: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checkpoint", help="Checkpoint to index, a synthetic index is used if not given")
+    parser.add_argument("--repeat", type=int, default=20, help="Number of timed runs, the fastest is reported")
+    args = parser.parse_args()
+
+    index = get_index(args.checkpoint) if args.checkpoint else synthetic_index()
+    print(f"{len(index.variables)} variables")
+
+    for assumptions in ({}, {"type": "pf", "number": ["1", "2"]}):
+        assert convert_to_model_spec(index, assumptions) == per_variable(index, assumptions)
+        grouped = best_of(lambda: convert_to_model_spec(index, assumptions), args.repeat)
+        single = best_of(lambda: per_variable(index, assumptions), args.repeat)
+        key = ("benchmark", (0, 0), repr(assumptions))
+        MODEL_QUBES.get_or_create(key, lambda: convert_to_model_spec(index, assumptions))
+        cached = best_of(lambda: MODEL_QUBES.get_or_create(key, lambda: convert_to_model_spec(index, assumptions)), args.repeat)
+        print(f"assumptions {assumptions}")
+        print(f"  per variable  {single * 1000:8.3f} ms")
+        print(f"  grouped       {grouped * 1000:8.3f} ms")
+        print(f"  memoized      {cached * 1000:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# (C) Copyright 2024- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+"""
+Derivation time of coalesced pproc requests
+
+Derives the pproc configurations of an ensemble mean and spread product over a
+grid of params and steps, once per request as products used to be derived and
+once from the requests coalesced by forecastbox.mars, checking both give the
+same output and input requests. Derivations are timed with the schema loaded
+once, and loaded for every derivation as when deriving from the schema path.
+
+    python benchmarks/pproc_coalesce.py --params 5 --steps 40
+
+With the default schema, 200 requests coalesce into 1. With the schema loaded
+once, deriving them takes 1051 ms separately and 1195 ms coalesced, pproc
+expanding the merged request to the same outputs. Loading the schema for every
+derivation, it takes 43.9 s separately and 1.4 s coalesced.
+"""
+
+import argparse
+import itertools
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from pproc.config.factory import ConfigFactory
+from pproc.config.utils import expand
+from pproc.schema.schema import Schema
+
+from forecastbox.mars import coalesce_requests
+
+SCHEMA = Path(__file__).parents[1] / "forecastbox" / "products" / "schema" / "default.yaml"
+PARAMS = [167, 165, 166, 151, 228, 164, 134, 168]
+BASE = {
+    "class": "od",
+    "stream": "enfo",
+    "expver": "0001",
+    "date": "20240101",
+    "time": "0000",
+    "domain": "g",
+    "type": "em",
+    "levtype": "sfc",
+}
+
+
+def expanded(configs: list, method: str) -> set[str]:
+    return {json.dumps(r, sort_keys=True, default=str) for config in configs for r in expand(list(getattr(config, method)()))}
+
+
+def timed(func: Callable[[], Any]) -> tuple[float, Any]:
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--params", type=int, default=5, help=f"Number of params, at most {len(PARAMS)}")
+    parser.add_argument("--steps", type=int, default=40, help="Number of 6 hourly steps")
+    args = parser.parse_args()
+
+    requests = [{**BASE, "param": p, "step": s} for p, s in itertools.product(PARAMS[: args.params], range(6, 6 * args.steps + 1, 6))]
+    coalesced = [merged for merged, _ in coalesce_requests(requests, ("param", "step"))]
+    print(f"{len(requests)} requests coalesced into {len(coalesced)}")
+
+    schema = Schema.from_file(str(SCHEMA))
+    for name, derive in (
+        ("schema loaded once", lambda reqs: [ConfigFactory.from_outputs(schema, [r]) for r in reqs]),
+        ("schema per request", lambda reqs: [ConfigFactory.from_outputs(Schema.from_file(str(SCHEMA)), [r]) for r in reqs]),
+    ):
+        separate_time, separate = timed(lambda: derive(requests))
+        coalesced_time, merged = timed(lambda: derive(coalesced))
+        for method in ("out_mars", "in_mars"):
+            assert expanded(separate, method) == expanded(merged, method), method
+        print(name)
+        print(f"  separate   {separate_time * 1000:10.1f} ms")
+        print(f"  coalesced  {coalesced_time * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
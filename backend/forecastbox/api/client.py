@@ -0,0 +1,156 @@
+# (C) Copyright 2024- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+"""
+Asynchronous client for the Cascade gateway.
+
+Mirrors `cascade.gateway.client.request_response`, but awaits the response on the
+event loop instead of blocking it, and reuses connected sockets between requests.
+"""
+
+import asyncio
+import logging
+from typing import cast
+
+import orjson
+import zmq
+import zmq.asyncio
+
+import cascade.gateway.api as api
+
+from forecastbox.settings import CASCADE_SETTINGS
+
+LOG = logging.getLogger(__name__)
+
+
+def serialize_request(m: api.CascadeGatewayAPI) -> bytes:
+    """Serialize a Request message in the format expected by the gateway."""
+    d = m.model_dump(mode="json")
+    if "clazz" in d:
+        raise ValueError("field `clazz` must not be present in the message")
+    d["clazz"] = type(m).__name__
+    if not d["clazz"].endswith("Request"):
+        raise ValueError("message must be a Request")
+    return orjson.dumps(d)
+
+
+def parse_response(raw: bytes, request: api.CascadeGatewayAPI) -> api.CascadeGatewayAPI:
+    """Parse the Response message corresponding to `request`."""
+    try:
+        rd = orjson.loads(raw)
+        rdc = rd.pop("clazz")
+        if not rdc.endswith("Response"):
+            raise ValueError("recieved message is not a Response")
+        if type(request).__name__[: -len("Request")] != rdc[: -len("Response")]:
+            raise ValueError("mismatch between sent and received classes")
+        if rdc not in api.__dict__.keys():
+            raise ValueError("message clazz not understood")
+        return cast(api.CascadeGatewayAPI, api.__dict__[rdc](**rd))
+    except Exception as e:
+        raise ValueError(f"failed to parse message: {raw[:32]!r} => {repr(e)[:32]}")
+
+
+class GatewayClient:
+    """Pooled request/response client for a Cascade gateway.
+
+    Up to `pool_size` REQ sockets are kept connected and reused, so concurrent
+    requests don't serialize behind one socket nor pay for a new connection.
+    A socket whose request timed out or failed is in an undefined state and is
+    discarded instead of being returned to the pool.
+    """
+
+    def __init__(self, url: str, pool_size: int):
+        self.url = url
+        self.pool_size = pool_size
+        self._context = zmq.asyncio.Context.instance()
+        self._idle: list[zmq.asyncio.Socket] = []
+        self._open = 0
+        self._available = asyncio.Condition()
+
+    async def _acquire(self) -> zmq.asyncio.Socket:
+        async with self._available:
+            while not self._idle and self._open >= self.pool_size:
+                await self._available.wait()
+
+            if self._idle:
+                return self._idle.pop()
+
+            socket = self._context.socket(zmq.REQ)
+            socket.connect(self.url)
+            self._open += 1
+            return socket
+
+    async def _release(self, socket: zmq.asyncio.Socket, healthy: bool) -> None:
+        async with self._available:
+            if healthy:
+                self._idle.append(socket)
+            else:
+                socket.close(linger=0)
+                self._open -= 1
+            self._available.notify()
+
+    async def request(self, m: api.CascadeGatewayAPI, timeout_ms: int) -> api.CascadeGatewayAPI:
+        """Send a Request message, and await the corresponding Response message.
+
+        Raises
+        ------
+        TimeoutError
+            If no response arrived within `timeout_ms`
+        ValueError
+            If the message could not be sent or parsed
+        """
+        payload = serialize_request(m)
+
+        socket = await self._acquire()
+        healthy = False
+        try:
+            await socket.send(payload)
+            if await socket.poll(timeout_ms, flags=zmq.POLLIN) == 0:
+                raise TimeoutError(f"No response from {self.url} within {timeout_ms} ms")
+            raw = await socket.recv()
+            healthy = True
+        except (TimeoutError, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            LOG.exception(f"failed to communicate on {self.url=}")
+            raise ValueError(f"failed to communicate on {self.url=} => {repr(e)[:32]}")
+        finally:
+            await asyncio.shield(self._release(socket, healthy))
+
+        return parse_response(raw, m)
+
+    def close(self) -> None:
+        """Close all idle sockets."""
+        for socket in self._idle:
+            socket.close(linger=0)
+        self._open -= len(self._idle)
+        self._idle.clear()
+
+
+CLIENTS: dict[str, GatewayClient] = {}
+
+
+def get_client(url: str | None = None) -> GatewayClient:
+    """Get the pooled client of a gateway, by default the one configured in `CASCADE_SETTINGS`."""
+    url = url or CASCADE_SETTINGS.cascade_url
+    if url not in CLIENTS:
+        CLIENTS[url] = GatewayClient(url, CASCADE_SETTINGS.gateway_pool_size)
+    return CLIENTS[url]
+
+
+async def request_response(m: api.CascadeGatewayAPI, url: str | None = None, timeout_ms: int | None = None) -> api.CascadeGatewayAPI:
+    """Send a Request message to the gateway, and await the corresponding Response message."""
+    return await get_client(url).request(m, timeout_ms or CASCADE_SETTINGS.gateway_timeout_ms)
+
+
+def close_clients() -> None:
+    """Close the sockets of all gateway clients."""
+    for gateway_client in CLIENTS.values():
+        gateway_client.close()
+    CLIENTS.clear()
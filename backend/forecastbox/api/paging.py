@@ -0,0 +1,49 @@
+# (C) Copyright 2024- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+"""
+Keyset pagination of job records
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any
+
+from bson import ObjectId
+from fastapi import HTTPException
+
+JOB_SORT = [("created_at", -1), ("_id", -1)]
+"""Order of job listings, newest first. Records without `created_at`, created before it was recorded, sort last."""
+
+
+def encode_cursor(record: dict[str, Any]) -> str:
+    """Encode the keyset position of a job record into an opaque cursor."""
+    created_at = record.get("created_at")
+    position = {"created_at": created_at.isoformat() if created_at else None, "_id": str(record["_id"])}
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    """Decode a cursor into a query selecting the records after it, in `JOB_SORT` order."""
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        created_at = datetime.fromisoformat(position["created_at"]) if position["created_at"] is not None else None
+        record_id = ObjectId(position["_id"])
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+    if created_at is None:
+        return {"created_at": None, "_id": {"$lt": record_id}}
+    return {
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": record_id}},
+            {"created_at": None},
+        ]
+    }
@@ -13,6 +13,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import HTMLResponse
 
 from pydantic import BaseModel
+from forecastbox.cache import CACHES, CacheStats
 from forecastbox.settings import CascadeSettings, APISettings, CASCADE_SETTINGS, API_SETTINGS
 
 from forecastbox.auth.users import current_active_user
@@ -62,3 +63,9 @@ async def post_settings(settings: ExposedSettings, admin=Depends(get_admin_user)
         return HTMLResponse(content=str(e), status_code=500)
 
     return HTMLResponse(content="Settings updated successfully", status_code=200)
+
+
+@router.get("/cache")
+async def get_cache_stats(admin=Depends(get_admin_user)) -> dict[str, CacheStats]:
+    """Get statistics of the in-memory caches"""
+    return {name: cache.stats() for name, cache in CACHES.items()}
@@ -9,21 +9,32 @@
 
 """Graph API Router."""
 
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime
+from pathlib import Path
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.responses import HTMLResponse
 
+import asyncio
+import copy
+import hashlib
+import json
+import os
 import tempfile
 import logging
 
+import cloudpickle
+
 from forecastbox.products.registry import get_product
 from forecastbox.models import Model
+from forecastbox.models.index import checkpoint_identity
 
 from .model import get_model_path
-from ..types import ExecutionSpecification
+from ..types import ExecutionSpecification, ProductSpecification
 
 from earthkit.workflows import Cascade, fluent
-from earthkit.workflows.graph import Graph, deduplicate_nodes
+from earthkit.workflows.graph import Graph
 
 from cascade.low.into import graph2job
 from cascade.low import views as cascade_views
@@ -31,13 +42,15 @@ from cascade.low import views as cascade_views
 from cascade.low.core import JobInstance, DatasetId
 
 import cascade.gateway.api as api
-import cascade.gateway.client as client
+from forecastbox.api import client
 
-from forecastbox.db import db
+from forecastbox.db import async_db as db
 from forecastbox.auth.users import current_active_user
 from forecastbox.schemas.user import User
 
-from forecastbox.settings import CASCADE_SETTINGS
+from forecastbox.cache import LRUCache
+from forecastbox.graph_builder import GraphBuilder
+from forecastbox.settings import API_SETTINGS, CASCADE_SETTINGS
 from forecastbox.api.types import VisualisationOptions
 
 router = APIRouter(
@@ -52,8 +65,94 @@ class SubmitResponse(api.SubmitJobResponse):
     output_ids: set[DatasetId]
 
 
+@dataclass
+class CompiledGraph:
+    """A built graph, and lazily its Cascade job instance."""
+
+    cascade: Cascade
+    job: JobInstance | None = None
+
+    def job_instance(self) -> JobInstance:
+        """Get a copy of the job instance of the graph."""
+        if self.job is None:
+            self.job = graph2job(self.cascade._graph)
+        return self.job.model_copy()
+
+
+GRAPH_CACHE: LRUCache[str, CompiledGraph] = LRUCache("graph", max_entries=API_SETTINGS.graph_cache_size)
+GRAPH_BUILD_EXECUTOR = ThreadPoolExecutor(max_workers=API_SETTINGS.graph_build_workers, thread_name_prefix="graph-build")
+
+
+def graph_cache_key(spec: ExecutionSpecification) -> str:
+    """Get a canonical hash of the parts of a specification which determine its graph.
+
+    The environment does not change the graph, so is not part of the key.
+    """
+    checkpoint_path = get_model_path(spec.model.model)
+    try:
+        identity = checkpoint_identity(checkpoint_path)
+    except FileNotFoundError:
+        identity = None
+    canonical = {
+        **spec.model_dump(mode="json", include={"model", "products"}),
+        "checkpoint": (str(checkpoint_path), identity),
+    }
+    return hashlib.sha256(json.dumps(canonical, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _graph_cache_path(key: str) -> Path:
+    return Path(API_SETTINGS.data_path) / "graph_cache" / f"{key}.pkl"
+
+
+def _load_cached_graph(key: str) -> CompiledGraph | None:
+    """Load a compiled graph from the on-disk cache."""
+    path = _graph_cache_path(key)
+    if not API_SETTINGS.graph_cache_on_disk or not path.exists():
+        return None
+    try:
+        with open(path, "rb") as f:
+            return cloudpickle.load(f)
+    except Exception as e:
+        LOG.warning(f"Failed to load cached graph {key}: {e}")
+        return None
+
+
+def _store_cached_graph(key: str, compiled: CompiledGraph) -> None:
+    """Store a compiled graph in the on-disk cache."""
+    if not API_SETTINGS.graph_cache_on_disk:
+        return
+    path = _graph_cache_path(key)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as f:
+            cloudpickle.dump(compiled, f)
+        os.replace(f.name, path)
+    except Exception as e:
+        LOG.warning(f"Failed to store cached graph {key}: {e}")
+
+
+async def compile_graph(spec: ExecutionSpecification) -> CompiledGraph:
+    """Get the compiled graph of a specification, building it only if not cached."""
+    key = graph_cache_key(spec)
+
+    compiled = GRAPH_CACHE.get(key)
+    if compiled is None:
+        compiled = _load_cached_graph(key)
+    if compiled is None:
+        compiled = CompiledGraph(await build_cascade(spec))
+        _store_cached_graph(key, compiled)
+
+    GRAPH_CACHE.put(key, compiled)
+    return compiled
+
+
 async def convert_to_cascade(spec: ExecutionSpecification) -> Cascade:
     """Convert a specification to a cascade."""
+    return (await compile_graph(spec)).cascade
+
+
+async def build_cascade(spec: ExecutionSpecification) -> Cascade:
+    """Build the cascade of a specification."""
 
     model_spec = dict(
         lead_time=spec.model.lead_time,
@@ -63,23 +162,35 @@ async def convert_to_cascade(spec: ExecutionSpecification) -> Cascade:
     model = Model(checkpoint_path=get_model_path(spec.model.model), **model_spec)
     model_action = model.graph(None, **spec.model.entries)
 
-    complete_graph = Graph([])
-
-    for product in spec.products:
+    def build_product(product: ProductSpecification) -> Graph:
         product_spec = product.specification.copy()
+        # Products are built in parallel threads, so each gets its own copy of the source action.
+        # The nodes themselves are shared, and are only ever read by products.
+        source = copy.copy(model_action)
+        source.nodes = model_action.nodes.copy()
         try:
-            product_graph = get_product(*product.product.split("/", 1)).to_graph(product_spec, model, model_action)
+            product_graph = get_product(*product.product.split("/", 1)).to_graph(product_spec, model, source)
         except Exception as e:
             raise Exception(f"Error in product {product}:\n{e}")
 
         if isinstance(product_graph, fluent.Action):
             product_graph = product_graph.graph()
-        complete_graph += product_graph
+        return product_graph
+
+    # Products are independent of each other, so are built concurrently and merged once deduplicated
+    loop = asyncio.get_running_loop()
+    product_graphs = await asyncio.gather(
+        *(loop.run_in_executor(GRAPH_BUILD_EXECUTOR, build_product, product) for product in spec.products)
+    )
+
+    builder = GraphBuilder()
+    for product_graph in product_graphs:
+        builder.add(product_graph)
 
     if len(spec.products) == 0:
-        complete_graph += model_action.graph()
+        builder.add(model_action)
 
-    return Cascade(deduplicate_nodes(complete_graph))
+    return Cascade(builder.graph())
 
 
 @router.post("/visualise")
@@ -104,8 +215,7 @@ async def get_graph_visualise(spec: ExecutionSpecification, options: Visualisati
 @router.post("/serialise")
 async def get_graph_serialised(spec: ExecutionSpecification) -> JobInstance:
     """Get serialised dump of product graph."""
-    graph = await convert_to_cascade(spec)
-    return graph2job(graph._graph)
+    return (await compile_graph(spec)).job_instance()
 
 
 @router.post("/download")
@@ -125,12 +235,10 @@ async def execute_api(spec: ExecutionSpecification, user: User = Depends(current
 async def execute(spec: ExecutionSpecification, user) -> api.SubmitJobResponse:
     """Get serialised dump of product graph."""
     try:
-        cascade_graph = await convert_to_cascade(spec)
+        job = (await compile_graph(spec)).job_instance()
     except Exception as e:
         return api.SubmitJobResponse(job_id=None, error=str(e))
 
-    job = graph2job(cascade_graph._graph)
-
     sinks = cascade_views.sinks(job)
     sinks = [s for s in sinks if not s.task.startswith("run_as_earthkit")]
 
@@ -155,7 +263,7 @@ async def execute(spec: ExecutionSpecification, user) -> api.SubmitJobResponse:
         )
     )
     try:
-        submit_job_response: api.SubmitJobResponse = client.request_response(r, f"{CASCADE_SETTINGS.cascade_url}")  # type: ignore
+        submit_job_response: api.SubmitJobResponse = await client.request_response(r, f"{CASCADE_SETTINGS.cascade_url}")  # type: ignore
     except Exception as e:
         return api.SubmitJobResponse(job_id=None, error="Failed to submit job: " + str(e))
 
@@ -174,7 +282,7 @@ async def execute(spec: ExecutionSpecification, user) -> api.SubmitJobResponse:
         "outputs": list(map(lambda x: x.task, sinks)),
     }
     collection = db.get_collection("job_records")
-    collection.insert_one(record)
+    await collection.insert_one(record)
 
     # submit_response = SubmitResponse(**submit_job_response.model_dump(), output_ids=sinks)
     return submit_job_response
@@ -9,26 +9,37 @@
 
 """Products API Router."""
 
-from functools import lru_cache
+import asyncio
 import json
-from fastapi import APIRouter, Response, Depends, UploadFile, Body
-from fastapi.responses import HTMLResponse
+import logging
+from datetime import datetime
+from fastapi import APIRouter, Response, Depends, UploadFile, Body, Query, Request
+from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
 from fastapi import HTTPException
+from sse_starlette.sse import EventSourceResponse
 
-from dataclasses import dataclass
-
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator
+from urllib.parse import quote
 
 from cascade.low.core import DatasetId, TaskId
 from cascade.controller.report import JobId
 
 import cascade.gateway.api as api
-import cascade.gateway.client as client
+from forecastbox import encoders, results
+from forecastbox.api import client
+from forecastbox.api.paging import JOB_SORT, decode_cursor, encode_cursor
 from forecastbox.schemas.user import User
 from forecastbox.auth.users import current_active_user
 
-from forecastbox.db import db
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from forecastbox.cache import LRUCache
+from forecastbox.db import async_db as db
 
-from forecastbox.settings import CASCADE_SETTINGS
+from forecastbox.settings import API_SETTINGS, CASCADE_SETTINGS
 from forecastbox.api.types import VisualisationOptions, ExecutionSpecification
 
 router = APIRouter(
@@ -36,6 +47,8 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+LOG = logging.getLogger(__name__)
+
 
 @dataclass
 class JobProgressResponse:
@@ -48,131 +61,346 @@ class JobProgressResponse:
 class JobProgressResponses:
     progresses: dict[JobId, JobProgressResponse]
     error: str | None = None
+    next_cursor: str | None = None
+    """Cursor of the next page, None if this is the last page."""
 
 
-def validate_job_id(job_id: JobId) -> bool:
+async def validate_job_id(job_id: JobId) -> JobId:
     collection = db.get_collection("job_records")
-    if collection.find({"job_id": job_id}):
+    if await collection.find_one({"job_id": job_id}, {"_id": 1}):
         return job_id
     raise HTTPException(status_code=404, detail=f"Job {job_id} not found in the database.")
 
 
-def get_job_progress(job_id: JobId = Depends(validate_job_id)) -> JobProgressResponse:
-    """Get progress of a job."""
-    response = None
-    error_on_request = None
+ACTIVE_STATUSES = ["running", "submitted"]
+"""Job statuses which require a progress request to Cascade."""
 
-    collection = db.get_collection("job_records")
+JOB_STATUS_PROJECTION = {"_id": 1, "job_id": 1, "status": 1, "error": 1, "created_at": 1}
+"""Projection of the job record fields needed to report progress."""
 
-    try:
-        response: api.JobProgressResponse = client.request_response(
-            api.JobProgressRequest(job_ids=[job_id]), f"{CASCADE_SETTINGS.cascade_url}"
-        )  # type: ignore
-    except TimeoutError as e:
-        collection.update_one({"job_id": job_id}, {"$set": {"status": "errored"}})
-        error_on_request = f"TimeoutError: {e}"
-    except KeyError as e:
-        collection.update_one({"job_id": job_id}, {"$set": {"status": "invalid"}})
-        error_on_request = f"KeyError: {e}"
-    except Exception as e:
-        collection.update_one({"job_id": job_id}, {"$set": {"status": "errored"}})
-        error_on_request = f"Exception: {e}"
 
-    finally:
-        if response is None:
-            return JobProgressResponse(
-                progress="0.00",
-                status=collection.find({"job_id": job_id})[0]["status"],
-                error=error_on_request,
-            )
+def resolve_progress(job_id: JobId, response: api.JobProgressResponse) -> tuple[JobProgressResponse, dict[str, Any]]:
+    """Resolve the progress of a job from a Cascade progress response.
 
+    Returns the progress response and the fields to update on the job record.
+    """
+    update: dict[str, Any] = {}
     if response.error:
-        collection.update_one({"job_id": job_id}, {"$set": {"status": "errored"}})
-        collection.update_one({"job_id": job_id}, {"$set": {"error": response.error}})
+        update["error"] = response.error
 
     jobprogress = response.progresses.get(job_id, None)
 
     if not jobprogress:
-        collection.update_one({"job_id": job_id}, {"$set": {"status": "invalid"}})
-        return JobProgressResponse(
-            progress="0.00",
-            status="invalid",
-            error="Job not found in the database.",
-        )
+        update["status"] = "invalid"
+        return JobProgressResponse(progress="0.00", status="invalid", error="Job not found in the database."), update
     elif jobprogress.failure:
-        # Update the job record in MongoDB to mark it as errored
-        collection.update_one({"job_id": job_id}, {"$set": {"status": "errored"}})
-        collection.update_one({"job_id": job_id}, {"$set": {"error": jobprogress.failure}})
+        update.update({"status": "errored", "error": jobprogress.failure})
     elif jobprogress.completed or jobprogress.pct == "100.00":
-        # Update the job record in MongoDB to mark it as completed
-        collection.update_one({"job_id": job_id}, {"$set": {"status": "completed"}})
+        update["status"] = "completed"
     else:
-        # Update the job record in MongoDB to mark it as running
-        collection.update_one({"job_id": job_id}, {"$set": {"status": "running"}})
+        update["status"] = "running"
 
     progress = jobprogress.pct if jobprogress.pct else "0.00" if jobprogress.failure else "100.00"
+    return JobProgressResponse(progress=progress, status=update["status"], error=jobprogress.failure), update
 
-    return JobProgressResponse(
-        progress=progress,
-        status=collection.find({"job_id": job_id})[0]["status"],
-        error=jobprogress.failure,
-    )
+
+async def request_progress(job_ids: list[JobId]) -> tuple[api.JobProgressResponse | None, str | None, str | None]:
+    """Request the progress of `job_ids` from Cascade in a single round trip.
+
+    Returns the response, or if the request failed, the status to set
+    on the jobs and the error.
+    """
+    try:
+        response: api.JobProgressResponse = await client.request_response(
+            api.JobProgressRequest(job_ids=job_ids), f"{CASCADE_SETTINGS.cascade_url}"
+        )  # type: ignore
+    except TimeoutError as e:
+        return None, "errored", f"TimeoutError: {e}"
+    except KeyError as e:
+        return None, "invalid", f"KeyError: {e}"
+    except Exception as e:
+        return None, "errored", f"Exception: {e}"
+    return response, None, None
+
+
+async def get_job_progress(job_id: JobId = Depends(validate_job_id)) -> JobProgressResponse:
+    """Get progress of a job."""
+    collection = db.get_collection("job_records")
+
+    response, status, error_on_request = await request_progress([job_id])
+    if response is None:
+        await collection.update_one({"job_id": job_id}, {"$set": {"status": status}})
+        return JobProgressResponse(progress="0.00", status=status, error=error_on_request)
+
+    progress, update = resolve_progress(job_id, response)
+    await collection.update_one({"job_id": job_id}, {"$set": update})
+    return progress
+
+
+def job_filter(
+    status: list[str] | None = None,
+    created_by: str | None = None,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+) -> dict[str, Any]:
+    """Build the Mongo filter for the job listing."""
+    query: dict[str, Any] = {}
+    if status:
+        query["status"] = {"$in": status}
+    if created_by:
+        query["created_by"] = ObjectId(created_by) if ObjectId.is_valid(created_by) else created_by
+    if created_after or created_before:
+        query["created_at"] = {}
+        if created_after:
+            query["created_at"]["$gte"] = created_after
+        if created_before:
+            query["created_at"]["$lt"] = created_before
+    return query
 
 
 @router.get("/status")
-async def get_status() -> JobProgressResponses:
-    """Get progress of all tasks recorded in the database."""
+async def get_status(
+    limit: int | None = Query(None, ge=1, le=1000, description="Maximum number of jobs to return, all if not given."),
+    cursor: str | None = Query(None, description="Cursor returned as `next_cursor` by the previous page."),
+    status: list[str] | None = Query(None, description="Only return jobs with these statuses."),
+    created_by: str | None = Query(None, description="Only return jobs created by this user id."),
+    created_after: datetime | None = Query(None, description="Only return jobs created at or after this time."),
+    created_before: datetime | None = Query(None, description="Only return jobs created before this time."),
+) -> JobProgressResponses:
+    """Get progress of the tasks recorded in the database.
+
+    Jobs are returned newest first, paginated with a keyset cursor on
+    `created_at` and `_id`. Uses one query for the job records, one progress
+    request to Cascade for the active jobs on the page and one bulk write for
+    the status changes, independent of the number of jobs.
+    """
 
     collection = db.get_collection("job_records")
-    job_records = collection.find({})
 
-    # Extract job IDs from the records
-    job_ids = [record["job_id"] for record in job_records]
+    query = job_filter(status, created_by, created_after, created_before)
+    if cursor:
+        query = {"$and": [query, decode_cursor(cursor)]}
+
+    records = collection.find(query, JOB_STATUS_PROJECTION).sort(JOB_SORT)
+    if limit is not None:
+        records = records.limit(limit + 1)
+    records = await records.to_list(None)
+
+    next_cursor = None
+    if limit is not None and len(records) > limit:
+        records = records[:limit]
+        next_cursor = encode_cursor(records[-1])
+
+    progresses: dict[JobId, JobProgressResponse] = {}
+    for record in records:
+        status = record["status"]
+        progresses[record["job_id"]] = JobProgressResponse(
+            progress="0.00" if not status == "completed" else "100.00", status=status, error=record.get("error")
+        )
+
+    active_ids = [record["job_id"] for record in records if record["status"] in ACTIVE_STATUSES]
+    if not active_ids:
+        return JobProgressResponses(progresses=progresses, error=None, next_cursor=next_cursor)
+
+    response, status, error_on_request = await request_progress(active_ids)
+    if response is None:
+        await collection.update_many({"job_id": {"$in": active_ids}}, {"$set": {"status": status}})
+        for job_id in active_ids:
+            progresses[job_id] = JobProgressResponse(progress="0.00", status=status, error=error_on_request)
+        return JobProgressResponses(progresses=progresses, error=error_on_request, next_cursor=next_cursor)
+
+    updates = []
+    for job_id in active_ids:
+        progresses[job_id], update = resolve_progress(job_id, response)
+        updates.append(UpdateOne({"job_id": job_id}, {"$set": update}))
+    await collection.bulk_write(updates, ordered=False)
+
+    return JobProgressResponses(progresses=progresses, error=None, next_cursor=next_cursor)
+
+
+@dataclass
+class JobProgressEvent:
+    """Progress of a job as pushed to stream subscribers."""
+
+    job_id: JobId
+    progress: str
+    status: str
+    error: str | None = None
+    available: list[TaskId] = field(default_factory=list)
+    """Outputs of the job which are available for retrieval."""
+
+
+class Subscription:
+    """Progress events pending for a subscriber.
 
-    for_status_job_ids = [id for id in job_ids if collection.find_one({"job_id": id})["status"] in ["running", "submitted"]]
-    db_status_ids = list(set(job_ids) - set(for_status_job_ids))
+    Only the latest event of each job is kept, and at most `maxsize` jobs, dropping the
+    oldest, so a slow or stalled subscriber cannot make the pending events grow.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._pending: dict[JobId, JobProgressEvent] = {}
+        self._ready = asyncio.Event()
+
+    def put(self, event: JobProgressEvent) -> None:
+        self._pending.pop(event.job_id, None)
+        self._pending[event.job_id] = event
+        while len(self._pending) > self.maxsize:
+            self._pending.pop(next(iter(self._pending)))
+        self._ready.set()
 
-    progresses = {job_id: get_job_progress(job_id) for job_id in for_status_job_ids}
+    async def get(self) -> JobProgressEvent:
+        while not self._pending:
+            self._ready.clear()
+            await self._ready.wait()
+        return self._pending.pop(next(iter(self._pending)))
 
-    for id in db_status_ids:
-        id_record = collection.find({"job_id": id})[0]
-        status = id_record["status"]
-        error = id_record["error"]
-        progresses[id] = JobProgressResponse(progress="0.00" if not status == "completed" else "100.00", status=status, error=error)
 
-    # Sort job records by created_at timestamp
-    sorted_job_ids = sorted(job_ids, key=lambda id: collection.find_one({"job_id": id}).get("created_at", 0))
+class ProgressBroadcaster:
+    """Polls Cascade for the progress of all active jobs and fans the changes out to subscribers.
 
-    # Update progresses to reflect the sorted order
-    progresses = {id: progresses[id] for id in sorted_job_ids if id in progresses}
+    A single poller runs while there is at least one subscriber, making one
+    progress request per tick regardless of the number of subscribers.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._subscribers: set[Subscription] = set()
+        self._state: dict[JobId, JobProgressEvent] = {}
+        self._task: asyncio.Task | None = None
+
+    def subscribe(self) -> Subscription:
+        """Subscribe to progress events, starting the poller if needed.
+
+        The subscription is primed with the last known state of every active job.
+        """
+        subscription = Subscription(API_SETTINGS.progress_stream_max_pending)
+        for event in self._state.values():
+            subscription.put(event)
+        self._subscribers.add(subscription)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    async def stop(self) -> None:
+        """Stop the poller."""
+        self._subscribers.clear()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        while self._subscribers:
+            try:
+                events = await self.poll()
+            except Exception as e:
+                LOG.warning(f"Failed to poll job progress: {e}")
+                events = []
+
+            for event in events:
+                for subscription in self._subscribers:
+                    subscription.put(event)
+            await asyncio.sleep(self.interval)
+
+    async def poll(self) -> list[JobProgressEvent]:
+        """Query the progress of all active jobs, returning the events which changed since the last tick."""
+        collection = db.get_collection("job_records")
+        cursor = collection.find({"status": {"$in": ACTIVE_STATUSES}}, JOB_STATUS_PROJECTION)
+        records = {record["job_id"]: record async for record in cursor}
+        if not records:
+            self._state = {}
+            return []
+
+        response, status, error_on_request = await request_progress(list(records))
+        if response is None and status == "errored":
+            # Cascade could not be reached, retry on the next tick rather than failing every active job
+            LOG.warning(f"Failed to request job progress, retrying on the next tick: {error_on_request}")
+            return []
+
+        events = []
+        updates = []
+        state = {}
+        for job_id, record in records.items():
+            if response is None:
+                progress, update, available = JobProgressResponse("0.00", status, error_on_request), {"status": status}, []
+            else:
+                progress, update = resolve_progress(job_id, response)
+                available = [x.task for x in response.datasets.get(job_id, [])]
+
+            if any(record.get(key) != val for key, val in update.items()):
+                updates.append(UpdateOne({"job_id": job_id}, {"$set": update}))
+
+            event = JobProgressEvent(job_id=job_id, available=available, **asdict(progress))
+            if self._state.get(job_id) != event:
+                events.append(event)
+            # Jobs which are no longer active are forgotten once their final state has been sent
+            if event.status in ACTIVE_STATUSES:
+                state[job_id] = event
+
+        if updates:
+            await collection.bulk_write(updates, ordered=False)
+
+        self._state = state
+        return events
+
+
+PROGRESS_BROADCASTER = ProgressBroadcaster(API_SETTINGS.progress_poll_interval)
+
+
+@router.get("/stream")
+async def stream_progress(request: Request, job_id: list[JobId] | None = Query(None)) -> EventSourceResponse:
+    """Stream progress events of active jobs.
+
+    Each `progress` event carries the progress, status and available outputs of a job,
+    and is sent whenever any of these change. Optionally only stream the jobs in `job_id`.
+    """
+    job_ids = set(job_id or [])
 
-    return JobProgressResponses(progresses=progresses, error=None)
+    async def event_generator():
+        subscription = PROGRESS_BROADCASTER.subscribe()
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=PROGRESS_BROADCASTER.interval)
+                except asyncio.TimeoutError:
+                    continue
+                if job_ids and event.job_id not in job_ids:
+                    continue
+                yield {"event": "progress", "data": json.dumps(asdict(event))}
+        finally:
+            PROGRESS_BROADCASTER.unsubscribe(subscription)
+
+    return EventSourceResponse(event_generator())
 
 
 @router.get("/{job_id}/status")
 async def get_status_of_job(job_id: JobId = Depends(validate_job_id)) -> JobProgressResponse:
     """Get progress of a job."""
-    return get_job_progress(job_id)
+    return await get_job_progress(job_id)
 
 
 @router.get("/{job_id}/outputs")
 async def get_outputs_of_job(job_id: JobId = Depends(validate_job_id)) -> list[TaskId]:
     """Get outputs of a job."""
     collection = db.get_collection("job_records")
-    outputs = collection.find({"job_id": job_id})
-    return outputs[0]["outputs"]
+    job = await collection.find_one({"job_id": job_id}, {"outputs": 1})
+    return job["outputs"]
 
 
 @router.post("/{job_id}/visualise")
 async def visualise_job(job_id: JobId = Depends(validate_job_id), options: VisualisationOptions = Body(None)) -> HTMLResponse:
     """Get outputs of a job."""
     collection = db.get_collection("job_records")
-    job = collection.find({"job_id": job_id})
+    job = await collection.find_one({"job_id": job_id}, {"graph_specification": 1})
 
     if not options:
         options = VisualisationOptions()
 
-    spec = ExecutionSpecification(**json.loads(job[0]["graph_specification"]))
+    spec = ExecutionSpecification(**json.loads(job["graph_specification"]))
 
     from .graph import convert_to_cascade
 
@@ -194,17 +422,17 @@ async def visualise_job(job_id: JobId = Depends(validate_job_id), options: Visua
 async def get_job_specification(job_id: JobId = Depends(validate_job_id)) -> ExecutionSpecification:
     """Get specification of a job."""
     collection = db.get_collection("job_records")
-    job = collection.find({"job_id": job_id})
-    return ExecutionSpecification(**json.loads(job[0]["graph_specification"]))
+    job = await collection.find_one({"job_id": job_id}, {"graph_specification": 1})
+    return ExecutionSpecification(**json.loads(job["graph_specification"]))
 
 
 @router.get("/{job_id}/restart")
 async def restart_job(job_id: JobId = Depends(validate_job_id), user: User = Depends(current_active_user)) -> api.SubmitJobResponse:
     """Get outputs of a job."""
     collection = db.get_collection("job_records")
-    job = collection.find({"job_id": job_id})
+    job = await collection.find_one({"job_id": job_id}, {"graph_specification": 1})
 
-    spec = ExecutionSpecification(**json.loads(job[0]["graph_specification"]))
+    spec = ExecutionSpecification(**json.loads(job["graph_specification"]))
 
     from .graph import execute
 
@@ -236,8 +464,7 @@ async def upload_job(file: UploadFile = None, user: User = Depends(current_activ
 async def job_info(job_id: JobId = Depends(validate_job_id)) -> dict:
     """Get outputs of a job."""
     collection = db.get_collection("job_records")
-    job = collection.find({"job_id": job_id})
-    return job[0]
+    return await collection.find_one({"job_id": job_id})
 
 
 @dataclass
@@ -255,7 +482,9 @@ async def get_job_availablity(job_id: JobId) -> list[TaskId]:
     job_id : str
         Job ID of the task
     """
-    response: api.JobProgressResponse = client.request_response(api.JobProgressRequest(job_ids=[job_id]), f"{CASCADE_SETTINGS.cascade_url}")
+    response: api.JobProgressResponse = await client.request_response(
+        api.JobProgressRequest(job_ids=[job_id]), f"{CASCADE_SETTINGS.cascade_url}"
+    )
 
     return [x.task for x in response.datasets[job_id]]
 
@@ -279,8 +508,11 @@ async def get_result_availablity(job_id: JobId, dataset_id: TaskId) -> DatasetAv
     DatasetAvailabilityResponse
         {'available': Availability of the result}
     """
+    if results.exists(job_id, dataset_id):
+        return DatasetAvailabilityResponse(True)
+
     try:
-        response: api.JobProgressResponse = client.request_response(
+        response: api.JobProgressResponse = await client.request_response(
             api.JobProgressRequest(job_ids=[job_id]), f"{CASCADE_SETTINGS.cascade_url}"
         )
     except ValueError as e:
@@ -292,64 +524,177 @@ async def get_result_availablity(job_id: JobId, dataset_id: TaskId) -> DatasetAv
     return DatasetAvailabilityResponse(dataset_id in [x.task for x in response.datasets[job_id]])
 
 
-def to_bytes(obj) -> tuple[bytes, str]:
-    """Convert an object to bytes."""
-    import io
-
-    if isinstance(obj, bytes):
-        return obj, "application/octet-stream"
-
-    try:
-        from earthkit.plots import Figure
-
-        if isinstance(obj, Figure):
-            buf = io.BytesIO()
-            obj.save(buf)
-            return buf.getvalue(), "image/png"
-    except ImportError:
-        pass
-    try:
-        import earthkit.data as ekd
+RESULT_CACHE: LRUCache[tuple[JobId, TaskId], api.ResultRetrievalResponse] = LRUCache(
+    "result",
+    max_bytes=API_SETTINGS.result_cache_max_bytes,
+    ttl=API_SETTINGS.result_cache_ttl,
+    sizeof=lambda response: len(response.result or ""),
+)
 
-        encoder = ekd.create_encoder("grib")
-        if isinstance(obj, ekd.Field):
-            return encoder.encode(obj).to_bytes(), "application/octet-stream"
-        elif isinstance(obj, ekd.FieldList):
-            return encoder.encode(obj[0], template=obj[0]).to_bytes(), "application/octet-stream"
-    except ImportError:
-        pass
 
-    raise TypeError(f"Unsupported type: {type(obj)}")
+async def result_cache(job_id: JobId, dataset_id: TaskId) -> api.ResultRetrievalResponse:
+    """Get a result from the cache, retrieving it from Cascade if missing.
 
+    Error responses are not cached, so a failed retrieval is retried on the next request.
+    """
+    key = (job_id, dataset_id)
+    response = RESULT_CACHE.get(key)
+    if response is not None:
+        return response
 
-@lru_cache
-def result_cache(job_id: JobId, dataset_id: TaskId) -> api.ResultRetrievalResponse:
-    """Get the path to the result cache."""
-    return client.request_response(
+    response = await client.request_response(
         api.ResultRetrievalRequest(job_id=job_id, dataset_id=DatasetId(task=dataset_id, output="0")), f"{CASCADE_SETTINGS.cascade_url}"
     )
+    if not response.error:
+        RESULT_CACHE.put(key, response)
+    return response
 
 
-@router.get("/{job_id}/{dataset_id}")
-async def get_result(job_id: JobId, dataset_id: TaskId) -> Response:
-    response = result_cache(job_id, dataset_id)
+def store_result(
+    job_id: JobId, dataset_id: TaskId, response: api.ResultRetrievalResponse, accept: str | None, options: dict[str, Any]
+) -> results.StoredResult:
+    """Decode a retrieved result, and store it on disk in the most preferred acceptable encoding.
+
+    Encoders are tried in order of preference, falling back to the next if encoding fails.
+    """
+    from cascade.gateway.api import decoded_result
+
+    try:
+        result = decoded_result(response, job=None)
+    except Exception as e:
+        raise HTTPException(500, f"Result decoding failed: {e}")
+
+    candidates = encoders.acceptable_encoders(result, accept)
+    if not candidates:
+        raise HTTPException(406, f"No acceptable encoding of {type(result).__name__} results")
+
+    for encoder in candidates:
+        try:
+            # Chunks are encoded lazily as they are written
+            chunks = encoder.encode(result, **encoder.select_options(options))
+            path = results.store(job_id, dataset_id, encoder.filename(options), chunks)
+            return results.StoredResult(path, encoder.media_type)
+        except Exception:
+            LOG.exception(f"Failed to encode result {dataset_id} of {job_id} as {encoder.media_type}")
+    raise HTTPException(500, f"Result encoding failed for {type(result).__name__} results")
+
+
+async def materialize_result(
+    job_id: JobId, dataset_id: TaskId, accept: str | None = None, options: dict[str, Any] | None = None
+) -> results.StoredResult:
+    """Get a stored result in an encoding acceptable by the Accept header.
+
+    If no acceptable encoding is stored, the result is encoded and stored. It is
+    retrieved from Cascade unless held in `RESULT_CACHE`, where it stays until its
+    TTL expires or the byte budget evicts it, for other encodings and options.
+    """
+    options = options or {}
+    stored = encoders.negotiate(results.find(job_id, dataset_id, options), accept)
+    if stored:
+        return stored[0]
+
+    response = await result_cache(job_id, dataset_id)
     if response.error:
         raise HTTPException(500, f"Result retrieval failed: {response.error}")
 
-    try:
-        from cascade.gateway.api import decoded_result
+    return await asyncio.to_thread(store_result, job_id, dataset_id, response, accept, options)
 
-        result = decoded_result(response, job=None)
-        bytez, media_type = to_bytes(result)
-    except Exception:
-        import cloudpickle
 
-        media_type = "application/pickle"
-        bytez = cloudpickle.dumps(result)
-        # return Response(response.model_dump_json(), media_type=media_type)
-        # raise HTTPException(500, f"Result retrieval failed: {e}")
+async def iter_bundle_results(job_id: JobId, outputs: list[TaskId]) -> AsyncIterator[tuple[TaskId, results.StoredResult | str]]:
+    """Materialize the results of `outputs` as they become available, yielding each once stored.
+
+    Results are retrieved concurrently, at most `API_SETTINGS.bundle_concurrency` at a time.
+    Yields the error instead of the stored result for outputs which could not be retrieved.
+    """
+    semaphore = asyncio.Semaphore(API_SETTINGS.bundle_concurrency)
+
+    async def fetch(dataset_id: TaskId) -> tuple[TaskId, results.StoredResult | str]:
+        async with semaphore:
+            try:
+                return dataset_id, await materialize_result(job_id, dataset_id)
+            except HTTPException as e:
+                return dataset_id, e.detail
+            except Exception as e:
+                return dataset_id, f"Result retrieval failed: {e}"
+
+    pending = []
+    for dataset_id in outputs:
+        stored = results.find(job_id, dataset_id)
+        if stored:
+            yield dataset_id, stored[0]
+        else:
+            pending.append(dataset_id)
+
+    while pending:
+        response, _, error = await request_progress([job_id])
+        if response is None:
+            for dataset_id in pending:
+                yield dataset_id, f"Job progress retrieval failed: {error}"
+            return
+
+        available = {x.task for x in response.datasets.get(job_id, [])}
+        ready = [dataset_id for dataset_id in pending if dataset_id in available]
+        pending = [dataset_id for dataset_id in pending if dataset_id not in available]
+
+        for fetched in asyncio.as_completed([fetch(dataset_id) for dataset_id in ready]):
+            yield await fetched
+
+        if pending:
+            progress, _ = resolve_progress(job_id, response)
+            if progress.status not in ACTIVE_STATUSES:
+                for dataset_id in pending:
+                    yield dataset_id, f"Result not available, job is {progress.status}"
+                return
+            await asyncio.sleep(API_SETTINGS.progress_poll_interval)
+
+
+@router.get("/{job_id}/bundle")
+async def get_bundle(job_id: JobId = Depends(validate_job_id)) -> StreamingResponse:
+    """Get all outputs of a job as a zip archive.
+
+    The archive is streamed, with each output added as soon as it is available,
+    so it can be requested while the job is still running. Outputs which could
+    not be retrieved are added as `{dataset_id}.error` files holding the error.
+    """
+    outputs = await get_outputs_of_job(job_id)
+
+    async def archive_stream():
+        archive, sink = results.open_archive()
+        async for dataset_id, stored in iter_bundle_results(job_id, outputs):
+            if isinstance(stored, results.StoredResult):
+                entry = results.iter_archive_entry(archive, sink, f"{quote(dataset_id, safe='')}{stored.path.suffix}", stored.path)
+            else:
+                entry = results.iter_archive_entry(archive, sink, f"{quote(dataset_id, safe='')}.error", stored.encode())
+            async for chunk in iterate_in_threadpool(entry):
+                if chunk:
+                    yield chunk
+        async for chunk in iterate_in_threadpool(results.iter_archive_end(archive, sink)):
+            yield chunk
+
+    return StreamingResponse(
+        archive_stream(), media_type="application/zip", headers={"Content-Disposition": f'attachment; filename="{job_id}.zip"'}
+    )
+
+
+@router.get("/{job_id}/{dataset_id}")
+async def get_result(
+    request: Request, job_id: JobId, dataset_id: TaskId, dpi: int | None = Query(None, gt=0, description="Resolution of rendered images")
+) -> Response:
+    """Get a result of a job.
+
+    The encoding is negotiated with the Accept header, among those registered in
+    `forecastbox.encoders` able to encode the result. Without an Accept header,
+    the preferred encoding of the result type is used.
+
+    Results are retrieved from Cascade once per encoding and then served from disk,
+    with support for range requests and conditional requests by ETag.
+    """
+    stored = await materialize_result(job_id, dataset_id, request.headers.get("accept"), {"dpi": dpi})
 
-    return Response(bytez, media_type=media_type)
+    etag = stored.etag
+    if results.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return FileResponse(stored.path, media_type=stored.media_type, headers={"ETag": etag})
 
 
 @dataclass
@@ -364,12 +709,13 @@ async def flush_job() -> JobDeletionResponse:
     Returns number of deleted jobs.
     """
     try:
-        client.request_response(api.ResultDeletionRequest(datasets={}), f"{CASCADE_SETTINGS.cascade_url}")  # type: ignore
+        await client.request_response(api.ResultDeletionRequest(datasets={}), f"{CASCADE_SETTINGS.cascade_url}")  # type: ignore
     except Exception as e:
         raise HTTPException(500, f"Job deletion failed: {e}")
     finally:
-        delete = db.get_collection("job_records").delete_many({})
-        result_cache.cache_clear()
+        delete = await db.get_collection("job_records").delete_many({})
+        RESULT_CACHE.clear()
+        await asyncio.to_thread(results.clear)
     return JobDeletionResponse(deleted_count=delete.deleted_count)
 
 
@@ -380,9 +726,11 @@ async def delete_job(job_id: JobId = Depends(validate_job_id)) -> JobDeletionRes
     Returns number of deleted jobs.
     """
     try:
-        client.request_response(api.ResultDeletionRequest(datasets={job_id: []}), f"{CASCADE_SETTINGS.cascade_url}")  # type: ignore
+        await client.request_response(api.ResultDeletionRequest(datasets={job_id: []}), f"{CASCADE_SETTINGS.cascade_url}")  # type: ignore
     except Exception as e:
         raise HTTPException(500, f"Job deletion failed: {e}")
     finally:
-        delete = db.get_collection("job_records").delete_one({"job_id": job_id})
+        delete = await db.get_collection("job_records").delete_one({"job_id": job_id})
+        RESULT_CACHE.invalidate(lambda key: key[0] == job_id)
+        await asyncio.to_thread(results.delete, job_id)
     return JobDeletionResponse(deleted_count=delete.deleted_count)
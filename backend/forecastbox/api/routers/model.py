@@ -11,25 +11,25 @@
 
 from collections import defaultdict
 from uuid import uuid4
-from fastapi import APIRouter, BackgroundTasks, HTTPException
+from fastapi import APIRouter, HTTPException, Query
+import asyncio
 import os
 
-from functools import lru_cache
-
 from typing import Any, Literal
 from pathlib import Path
 
-import httpx
-import requests
-import tempfile
-import shutil
 from pydantic import BaseModel
 
 from ..types import ModelSpecification, ModelName
-from forecastbox.models.model import Model, model_versions, model_info
+from forecastbox.models.index import remove_index
+from forecastbox.models.manager import DOWNLOAD_MANAGER, DownloadJob
+from forecastbox.models.manifest import get_manifest
+from forecastbox.models.model import Model, forget_model, model_versions, model_info
+from forecastbox.products.configuration import CONFIGURATIONS
+from forecastbox.products.registry import VALID_PRODUCTS
 
 from forecastbox.settings import API_SETTINGS
-from forecastbox.db import db
+from forecastbox.db import async_db as db
 
 router = APIRouter(
     tags=["model"],
@@ -57,15 +57,13 @@ async def get_available_models() -> dict[Category, list[ModelName]]:
         Dictionary containing model categories and their models
     """
 
-    manifest_path = os.path.join(API_SETTINGS.model_repository, "MANIFEST")
-
-    response = requests.get(manifest_path)
-    if response.status_code != 200:
-        raise HTTPException(response.status_code, f"Failed to fetch manifest from {manifest_path}")
+    manifest = await get_manifest()
+    if manifest is None:
+        raise HTTPException(503, f"Failed to fetch manifest from {API_SETTINGS.model_repository}")
 
     models = defaultdict(list)
 
-    for model in response.text.split("\n"):
+    for model in manifest.models:
         cat, name = model.split("/")
         models[cat].append(name)
     return models
@@ -79,38 +77,19 @@ class DownloadResponse(BaseModel):
     error: str | None = None
 
 
-async def download_file(download_id: str, url: str, download_path: str) -> DownloadResponse:
-    collection = db.get_collection("model_downloads")
-    try:
-        tempfile_path = tempfile.NamedTemporaryFile(prefix="model_", suffix=".ckpt", delete=False)
-
-        async with httpx.AsyncClient() as client_http:
-            async with client_http.stream("GET", url) as response:
-                response.raise_for_status()
-                total = int(response.headers.get("Content-Length", 0))
-                downloaded = 0
-                chunk_size = 1024
-                file_path = tempfile_path.name
-                with open(file_path, "wb") as file:
-                    async for chunk in response.aiter_bytes(chunk_size):
-                        file.write(chunk)
-                        downloaded += len(chunk)
-                        progress = int((downloaded / total) * 100) if total else 0
-                        collection.update_one(
-                            {"_id": download_id},
-                            {"$set": {"progress": progress}},
-                        )
-
-                shutil.move(file_path, download_path)
-        collection.update_one(
-            {"_id": download_id},
-            {"$set": {"status": "completed"}},
-        )
-    except Exception as e:
-        collection.update_one(
-            {"_id": download_id},
-            {"$set": {"status": "errored", "error": str(e)}},
-        )
+def to_download_response(job: DownloadJob) -> DownloadResponse:
+    """Get the response describing a download of the manager."""
+    messages = {
+        "queued": "Download queued.",
+        "in_progress": "Download in progress.",
+        "errored": "Download failed.",
+        "completed": "Download completed.",
+        "cancelled": "Download cancelled.",
+    }
+    status = {"queued": "in_progress", "cancelled": "not_downloaded"}.get(job.status, job.status)
+    return DownloadResponse(
+        download_id=job.download_id, message=messages[job.status], status=status, progress=job.progress, error=job.error
+    )
 
 
 @router.get("/{model_id}/downloaded")
@@ -126,8 +105,12 @@ async def check_if_downloaded(model_id: str) -> DownloadResponse:
             progress=100.00,
         )
 
+    job = DOWNLOAD_MANAGER.get(model_id)
+    if job is not None:
+        return to_download_response(job)
+
     collection = db.get_collection("model_downloads")
-    existing_download = collection.find_one({"model": model_id})
+    existing_download = await collection.find_one({"model": model_id})
     if existing_download:
         return DownloadResponse(
             download_id=existing_download["_id"],
@@ -146,8 +129,16 @@ async def check_if_downloaded(model_id: str) -> DownloadResponse:
 
 
 @router.post("/{model_id}/download")
-def download(model_id: str, background_tasks: BackgroundTasks) -> DownloadResponse:
-    """Download a model."""
+async def download(
+    model_id: str, priority: int = Query(0, description="Downloads with lower priorities are started first")
+) -> DownloadResponse:
+    """Queue the download of a model.
+
+    A previous download which errored, or which was interrupted by a restart, is restarted,
+    resuming from what it had downloaded.
+    """
+    if API_SETTINGS.offline:
+        raise HTTPException(503, "Models cannot be downloaded in offline mode.")
 
     repo = API_SETTINGS.model_repository
 
@@ -157,11 +148,16 @@ def download(model_id: str, background_tasks: BackgroundTasks) -> DownloadRespon
 
     collection = db.get_collection("model_downloads")
 
-    existing_download = collection.find_one({"model": model_id})
-    if existing_download:
+    job = DOWNLOAD_MANAGER.get(model_id)
+    if job is not None and job.status in ("queued", "in_progress"):
+        return to_download_response(job)
+
+    existing_download = await collection.find_one({"model": model_id})
+    # An active download without a job in this process was interrupted by a restart, so is resubmitted
+    if existing_download and existing_download["status"] not in ("errored", "queued", "in_progress"):
         return DownloadResponse(
             download_id=existing_download["_id"],
-            message="Download already in progress.",
+            message=f"Download already {existing_download['status']}.",
             status=existing_download["status"],
             progress=existing_download["progress"],
         )
@@ -177,20 +173,29 @@ def download(model_id: str, background_tasks: BackgroundTasks) -> DownloadRespon
             progress=100.00,
         )
 
+    if existing_download:
+        await collection.delete_one({"_id": existing_download["_id"]})
+
     download_id = str(uuid4())
 
-    collection.insert_one({"_id": download_id, "model": model_id, "status": "in_progress", "progress": 0})
-    background_tasks.add_task(download_file, download_id, model_path, model_download_path)
-    return DownloadResponse(
-        download_id=download_id,
-        message="Download started.",
-        status="in_progress",
-        progress=0.00,
-    )
+    await collection.insert_one({"_id": download_id, "model": model_id, "status": "in_progress", "progress": 0})
+    return to_download_response(DOWNLOAD_MANAGER.submit(download_id, model_id, model_path, model_download_path, priority))
+
+
+@router.delete("/{model_id}/download")
+async def cancel_download(model_id: str) -> DownloadResponse:
+    """Cancel the download of a model, discarding what was downloaded."""
+
+    job = await DOWNLOAD_MANAGER.cancel(model_id)
+    if job is None:
+        raise HTTPException(404, f"No download of {model_id} to cancel.")
+
+    await db.get_collection("model_downloads").delete_one({"_id": job.download_id})
+    return to_download_response(job)
 
 
 @router.delete("/{model_id}")
-def delete_model(model_id: str) -> DownloadResponse:
+async def delete_model(model_id: str) -> DownloadResponse:
     """Delete a model."""
 
     model_path = get_model_path(model_id.replace("_", "/"))
@@ -205,8 +210,13 @@ def delete_model(model_id: str) -> DownloadResponse:
     collection = db.get_collection("model_downloads")
     try:
         os.remove(model_path)
-        if collection.find_one({"model": model_id}):
-            collection.delete_one({"model": model_id})
+        remove_index(model_path)
+        forget_model(model_path)
+        CONFIGURATIONS.invalidate(lambda key: key[1] == str(model_path))
+        VALID_PRODUCTS.invalidate(lambda key: key[0] == str(model_path))
+        DOWNLOAD_MANAGER.forget(model_id)
+        if await collection.find_one({"model": model_id}):
+            await collection.delete_one({"model": model_id})
     except Exception as e:
         raise e
 
@@ -241,7 +251,6 @@ def install(model_id: str) -> InstallResponse:
 
 
 # Model Info
-@lru_cache(maxsize=128)
 @router.get("/{model_id}/info")
 async def get_model_info(model_id: str) -> dict[str, Any]:
     """
@@ -257,7 +266,8 @@ async def get_model_info(model_id: str) -> dict[str, Any]:
     dict[str, Any]
             Dictionary containing model information
     """
-    return model_info(get_model_path(model_id.replace("_", "/")))
+    # Read from the checkpoint index, which is built on first use if missing
+    return await asyncio.to_thread(model_info, get_model_path(model_id.replace("_", "/")))
 
 
 @router.post("/{model_id}/spec")
@@ -9,19 +9,25 @@
 
 """Products API Router."""
 
+import asyncio
+import json
+from pathlib import Path
+
 from fastapi import APIRouter
 
 from typing import Any
 
-from forecastbox.products.product import Product, USER_DEFINED
+from forecastbox.products.configuration import CONFIGURATIONS, ConfigurationSolver
+from forecastbox.products.product import Product
 
-from forecastbox.products.registry import get_categories, get_product, Category
+from forecastbox.products.registry import get_categories, get_product, get_valid_products, Category
 from forecastbox.models import Model
+from forecastbox.models.index import get_index
+from forecastbox.models.manager import DOWNLOAD_MANAGER
 
 from .model import get_model_path
 
 from ..types import ConfigEntry, ProductConfiguration, ModelSpecification
-from qubed import Qube
 
 
 router = APIRouter(
@@ -40,48 +46,37 @@ def get_model(model: ModelSpecification) -> Model:
     return Model(checkpoint_path=model_path, **model_dict)
 
 
-def select_from_params(available_spec: Qube, params: dict[str, Any]) -> Qube:
-    for key, val in params.items():
-        if not val:
-            continue
-        if key in available_spec.axes() and USER_DEFINED in available_spec.span(key):
-            # Dont select if open ended
-            continue
-
-        available_spec = available_spec.select(
-            {key: str(val) if not isinstance(val, (list, tuple)) else list(map(str, val))}, consume=False
-        )
-
-    return available_spec
+def get_configuration_solver(product: Product, modelspec: ModelSpecification) -> tuple[Model, ConfigurationSolver]:
+    """Get the configuration solver of a product with a model, indexing the product once per model."""
+    model_spec = get_model(modelspec)
+    key = (
+        type(product),
+        str(model_spec.checkpoint_path),
+        model_spec.index.checkpoint_identity,
+        json.dumps(modelspec.model_dump(), sort_keys=True, default=str),
+    )
+    solver = CONFIGURATIONS.get_or_create(key, lambda: ConfigurationSolver(product.model_intersection(model_spec)))
+    return model_spec, solver
 
 
 async def product_to_config(product: Product, modelspec: ModelSpecification, params: dict[str, Any]) -> dict[str, ConfigEntry]:
     """Convert a product to a configuration."""
 
-    # product_spec = product.qube
+    model_spec, solver = get_configuration_solver(product, modelspec)
 
-    model_spec = get_model(modelspec)
-    # model_qube = model_spec.qube(product.model_assumptions)
+    unconstrained = solver.select({})
+    constraining = {k: solver.select({k: v}) for k, v in params.items()}
 
-    available_product_spec = product.model_intersection(model_spec)
-    subsetted_spec = select_from_params(available_product_spec, params)
-
-    axes = subsetted_spec.axes()
+    axes = solver.select(params).axes()
 
     entries = {}
     for key, val in axes.items():
         # Add back in other options when selected
-        constrained = []
-        for k, v in params.items():
-            if k == key or k not in params:
-                continue
-
-            if sorted(select_from_params(available_product_spec, {}).span(key)) != sorted(
-                select_from_params(available_product_spec, {k: v}).span(key)
-            ):
-                constrained.append(product.label.get(k, k))
+        constrained = [
+            product.label.get(k, k) for k, selection in constraining.items() if k != key and unconstrained.span(key) != selection.span(key)
+        ]
 
-        val = select_from_params(available_product_spec, {k: v for k, v in params.items() if not k == key}).axes().get(key, val)
+        val = solver.select({k: v for k, v in params.items() if not k == key}).span(key) or val
 
         entries[key] = ConfigEntry(
             label=product.label.get(key, key),
@@ -108,14 +103,13 @@ async def api_get_categories() -> dict[str, Category]:
 @router.post("/valid-categories")
 async def get_valid_categories(modelspec: ModelSpecification) -> dict[str, Category]:
     model_spec = get_model(modelspec)
+    valid_products = await asyncio.to_thread(get_valid_products, model_spec)
 
     categories = get_categories()
     for key, category in categories.items():
         options = []
         for product in category.options:
-            prod = get_product(key, product)
-
-            if prod.validate_intersection(model_spec):
+            if product in valid_products.get(key, []):
                 category.available = True
                 options.append(product)
             else:
@@ -124,6 +118,14 @@ async def get_valid_categories(modelspec: ModelSpecification) -> dict[str, Categ
     return categories
 
 
+@DOWNLOAD_MANAGER.on_downloaded
+def warm_valid_products(checkpoint_path: Path) -> None:
+    """Find the products valid with a downloaded model, with and without ensemble members."""
+    lead_time = int(get_index(checkpoint_path).timestep_seconds // 3600)
+    for ensemble_members in (1, 2):
+        get_valid_products(Model(checkpoint_path=checkpoint_path, lead_time=lead_time, date="", ensemble_members=ensemble_members))
+
+
 @router.post("/configuration/{category}/{product}")
 async def get_product_configuration(category: str, product: str, model: ModelSpecification, spec: dict[str, Any]) -> ProductConfiguration:
     prod = get_product(category, product)
@@ -0,0 +1,192 @@
+# (C) Copyright 2024- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+"""
+In-memory caches
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import RLock
+from typing import Any, Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+CACHES: dict[str, "LRUCache"] = {}
+"""All named caches, by name."""
+
+_MISSING = object()
+
+
+@dataclass
+class CacheStats:
+    """Cache statistics"""
+
+    entries: int
+    max_entries: int | None
+    bytes: int
+    max_bytes: int | None
+    ttl: float | None
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+
+
+@dataclass
+class _Entry(Generic[V]):
+    value: V
+    size: int
+    expires_at: float | None
+
+
+class LRUCache(Generic[K, V]):
+    """Thread-safe least recently used cache.
+
+    Parameters
+    ----------
+    name : str
+        Name to register the cache under in `CACHES`
+    max_entries : int, optional
+        Maximum number of entries, by default unbounded
+    max_bytes : int, optional
+        Maximum total size of entries as measured by `sizeof`, by default unbounded
+    ttl : float, optional
+        Seconds after which an entry expires, by default never
+    sizeof : Callable[[V], int], optional
+        Size of a value in bytes, required to make use of `max_bytes`
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_entries: int | None = None,
+        max_bytes: int | None = None,
+        ttl: float | None = None,
+        sizeof: Callable[[V], int] | None = None,
+    ):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+
+        self._entries: OrderedDict[K, _Entry[V]] = OrderedDict()
+        self._bytes = 0
+        self._lock = RLock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+        CACHES[name] = self
+
+    def get(self, key: K, default: Any = None) -> V | Any:
+        """Get an entry, marking it as recently used."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self._expirations += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return default
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return entry.value
+
+    def put(self, key: K, value: V) -> None:
+        """Add an entry, evicting the least recently used entries if over capacity.
+
+        A value larger than `max_bytes` on its own is not cached.
+        """
+        size = self.sizeof(value) if self.sizeof is not None else 0
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+
+        with self._lock:
+            self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._entries[key] = _Entry(value, size, expires_at)
+            self._bytes += size
+            self._evict()
+
+    def get_or_create(self, key: K, factory: Callable[[], V]) -> V:
+        """Get an entry, creating and adding it with `factory` if missing."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.put(key, value)
+        return value
+
+    def pop(self, key: K, default: Any = None) -> V | Any:
+        """Remove an entry."""
+        with self._lock:
+            entry = self._remove(key)
+            return default if entry is None else entry.value
+
+    def invalidate(self, predicate: Callable[[K], bool]) -> int:
+        """Remove all entries whose key matches `predicate`, returning the number removed."""
+        with self._lock:
+            keys = [key for key in self._entries if predicate(key)]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: K) -> _Entry[V] | None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+        return entry
+
+    def _over_capacity(self) -> bool:
+        if self.max_entries is not None and len(self._entries) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self._bytes > self.max_bytes
+
+    def _evict(self) -> None:
+        while self._entries and self._over_capacity():
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self._evictions += 1
+
+    def keys(self) -> list[K]:
+        with self._lock:
+            return list(self._entries.keys())
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                entries=len(self._entries),
+                max_entries=self.max_entries,
+                bytes=self._bytes,
+                max_bytes=self.max_bytes,
+                ttl=self.ttl,
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                expirations=self._expirations,
+            )
+
+    def __contains__(self, key: K) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (entry.expires_at is None or entry.expires_at > time.monotonic())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
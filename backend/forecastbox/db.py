@@ -13,15 +13,12 @@ from forecastbox.schemas.user import User
 
 import motor.motor_asyncio
 from beanie import init_beanie
-from pymongo import MongoClient
 
 SETTINGS = FIABSettings()
 db_name = SETTINGS.mongodb_database
 
 async_client = motor.motor_asyncio.AsyncIOMotorClient(SETTINGS.mongodb_uri, uuidRepresentation="standard")
-mongo_client = MongoClient(SETTINGS.mongodb_uri)
 
-db = mongo_client[db_name]
 async_db = async_client[db_name]
 
 
@@ -36,3 +33,5 @@ async def init_db():
             User,
         ],
     )
+    await async_db["job_records"].create_index("job_id")
+    await async_db["job_records"].create_index([("created_at", 1), ("_id", 1)])
@@ -0,0 +1,238 @@
+# (C) Copyright 2024- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+"""
+Registry of job result encoders
+
+Encoders are tried in registration order, so for each type of result the
+preferred encoding is registered first, and pickle, which accepts anything,
+is registered last as the fallback.
+"""
+
+import functools
+import importlib
+import io
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+ENCODERS: list["Encoder"] = []
+
+
+@dataclass
+class Encoder:
+    """Result encoder"""
+
+    media_type: str
+    """Media type of the encoded result."""
+    extension: str
+    """File extension of the encoded result."""
+    accepts: Callable[[Any], bool]
+    """Whether a result can be encoded."""
+    encode: Callable[..., Iterable[bytes | memoryview]]
+    """Encode a result, given the options, as chunks of bytes."""
+    options: tuple[str, ...] = ()
+    """Names of the options changing the encoded result."""
+
+    def select_options(self, options: dict[str, Any]) -> dict[str, Any]:
+        return {key: options[key] for key in self.options if options.get(key) is not None}
+
+    def filename(self, options: dict[str, Any]) -> str:
+        """File name of a result encoded with `options`."""
+        variant = "".join(f".{key}-{value}" for key, value in self.select_options(options).items())
+        return f"result{variant}{self.extension}"
+
+
+def register_encoder(media_type: str, extension: str, accepts: Callable[[Any], bool], options: tuple[str, ...] = ()) -> Callable:
+    """
+    Register a result encoder.
+
+    Parameters
+    ----------
+    media_type : str
+        Media type of the encoded result
+    extension : str
+        File extension of the encoded result
+    accepts : Callable[[Any], bool]
+        Whether a result can be encoded
+    options : tuple[str, ...], optional
+        Names of the options the encoder takes as keyword arguments
+
+    Returns
+    -------
+    Callable
+        Decorator Function
+    """
+
+    def decorator(func: Callable[..., Iterable[bytes | memoryview]]) -> Callable[..., Iterable[bytes | memoryview]]:
+        ENCODERS.append(Encoder(media_type, extension, accepts, func, options))
+        return func
+
+    return decorator
+
+
+def get_encoder(filename: str, options: dict[str, Any]) -> Encoder | None:
+    """Get the encoder which produced a file named `filename` with `options`."""
+    for encoder in ENCODERS:
+        if encoder.filename(options) == filename:
+            return encoder
+    return None
+
+
+def instance_of(module: str, *names: str) -> Callable[[Any], bool]:
+    """Check whether a result is an instance of a type of an optional dependency."""
+
+    def accepts(obj: Any) -> bool:
+        try:
+            types = tuple(getattr(importlib.import_module(module), name) for name in names)
+        except (ImportError, AttributeError):
+            return False
+        return isinstance(obj, types)
+
+    return accepts
+
+
+def parse_accept(accept: str | None) -> tuple[list[str], set[str]]:
+    """Parse an Accept header.
+
+    Returns the accepted media ranges, most preferred first, and the media ranges explicitly not accepted.
+    """
+    if not accept:
+        return ["*/*"], set()
+
+    ranges: list[tuple[float, int, str]] = []
+    excluded: set[str] = set()
+    for index, part in enumerate(accept.split(",")):
+        media_range, *params = [p.strip() for p in part.split(";")]
+        if not media_range:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            ranges.append((-quality, index, media_range.lower()))
+        else:
+            excluded.add(media_range.lower())
+    return [media_range for _, _, media_range in sorted(ranges)], excluded
+
+
+def matches(media_range: str, media_type: str) -> bool:
+    main, _, sub = media_range.partition("/")
+    type_main, _, type_sub = media_type.partition("/")
+    return main == "*" or (main == type_main and sub in ("*", type_sub))
+
+
+def negotiate(candidates: Iterable[T], accept: str | None, media_type: Callable[[T], str] = lambda x: x.media_type) -> list[T]:
+    """Order the acceptable candidates by preference of the Accept header, then by their own order."""
+    ranges, excluded = parse_accept(accept)
+    candidates = [c for c in candidates if media_type(c) not in excluded]
+
+    ordered: list[T] = []
+    for media_range in ranges:
+        ordered.extend(c for c in candidates if matches(media_range, media_type(c)) and c not in ordered)
+    return ordered
+
+
+def acceptable_encoders(obj: Any, accept: str | None) -> list[Encoder]:
+    """Get the encoders able to encode `obj` in a format acceptable by the Accept header, most preferred first."""
+    return negotiate((encoder for encoder in ENCODERS if encoder.accepts(obj)), accept)
+
+
+@register_encoder("application/octet-stream", ".bin", lambda obj: isinstance(obj, (bytes, bytearray, memoryview)))
+def encode_bytes(obj) -> Iterator[bytes | memoryview]:
+    yield memoryview(obj)
+
+
+@functools.cache
+def grib_encoder():
+    """Get the shared GRIB encoder."""
+    import earthkit.data as ekd
+
+    return ekd.create_encoder("grib")
+
+
+@register_encoder("application/x-grib", ".grib", instance_of("earthkit.data", "Field", "FieldList"))
+def encode_grib(obj) -> Iterator[bytes]:
+    """Encode fields as concatenated GRIB messages, one message at a time.
+
+    Fields read from GRIB are passed through as their original message, other fields are encoded.
+    """
+    import earthkit.data as ekd
+    from earthkit.data.readers.grib.codes import GribField
+
+    encoder = grib_encoder()
+    for f in [obj] if isinstance(obj, ekd.Field) else obj:
+        yield f.message() if isinstance(f, GribField) else encoder.encode(f).to_bytes()
+
+
+@register_encoder("image/png", ".png", instance_of("earthkit.plots", "Figure"), options=("dpi",))
+def encode_png(obj, dpi: int | None = None) -> Iterator[bytes]:
+    buf = io.BytesIO()
+    obj.save(buf, format="png", **({"dpi": dpi} if dpi else {}))
+    yield buf.getvalue()
+
+
+@register_encoder("image/svg+xml", ".svg", instance_of("earthkit.plots", "Figure"))
+def encode_svg(obj) -> Iterator[bytes]:
+    buf = io.BytesIO()
+    obj.save(buf, format="svg")
+    yield buf.getvalue()
+
+
+@register_encoder("application/x-npy", ".npy", instance_of("numpy", "ndarray"))
+def encode_npy(obj) -> Iterator[bytes | memoryview]:
+    """Encode an array in the `.npy` format, yielding the array's own buffer after the header."""
+    import numpy as np
+
+    if obj.dtype.hasobject:
+        raise TypeError("Arrays of objects cannot be encoded without pickling")
+
+    array = obj if obj.flags.c_contiguous else np.ascontiguousarray(obj)
+    header = io.BytesIO()
+    np.lib.format.write_array_header_2_0(header, np.lib.format.header_data_from_array_1_0(array))
+    yield header.getvalue()
+    yield memoryview(array.reshape(-1)).cast("B")
+
+
+def iter_netcdf(obj, chunk_size: int = 1024**2) -> Iterator[bytes]:
+    """Write an xarray object to a temporary netCDF file, yielding its contents in chunks.
+
+    Writing to a file rather than to memory keeps the whole encoded result from being held at once.
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "result.nc")
+        obj.to_netcdf(path)
+        with open(path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+
+@register_encoder("application/x-netcdf", ".nc", instance_of("xarray", "Dataset", "DataArray"))
+def encode_xarray_netcdf(obj) -> Iterator[bytes]:
+    yield from iter_netcdf(obj)
+
+
+@register_encoder("application/x-netcdf", ".nc", instance_of("earthkit.data", "FieldList"))
+def encode_fieldlist_netcdf(obj) -> Iterator[bytes]:
+    yield from iter_netcdf(obj.to_xarray())
+
+
+@register_encoder("application/pickle", ".pkl", lambda obj: True)
+def encode_pickle(obj) -> Iterator[bytes]:
+    import cloudpickle
+
+    yield cloudpickle.dumps(obj)
@@ -27,6 +27,9 @@ from dataclasses import dataclass
 
 import logging
 from forecastbox.db import init_db
+from forecastbox.api import client
+from forecastbox.models import manifest
+from forecastbox.models.manager import DOWNLOAD_MANAGER
 
 
 from .api.routers import model
@@ -45,7 +48,10 @@ LOG = logging.getLogger(__name__)
 async def lifespan(app: FastAPI):
     await init_db()
     yield
+    await job.PROGRESS_BROADCASTER.stop()
+    await DOWNLOAD_MANAGER.stop()
     await gateway.shutdown_processes()
+    client.close_clients()
 
 
 app = FastAPI(
@@ -96,33 +102,24 @@ class StatusResponse:
 
 
 @app.get("/api/v1/status", tags=["status"])
-def status() -> StatusResponse:
+async def status() -> StatusResponse:
     """
     Status endpoint
     """
-    from forecastbox.settings import CASCADE_SETTINGS, API_SETTINGS
+    from forecastbox.settings import CASCADE_SETTINGS
 
     status = {"api": "up", "cascade": "up", "ecmwf": "up"}
 
-    from cascade.gateway import client, api
+    from cascade.gateway import api
 
     try:
-        client.request_response(api.JobProgressRequest(job_ids=[]), CASCADE_SETTINGS.cascade_url, timeout_ms=1000)
+        await client.request_response(api.JobProgressRequest(job_ids=[]), CASCADE_SETTINGS.cascade_url, timeout_ms=1000)
         status["cascade"] = "up"
     except Exception as e:
         LOG.warning(f"Error connecting to Cascade: {e}")
         status["cascade"] = "down"
 
-    # Check connection to model_repository
-    import requests
-
-    try:
-        response = requests.get(f"{API_SETTINGS.model_repository}/MANIFEST", timeout=1)
-        if response.status_code == 200:
-            status["ecmwf"] = "up"
-        else:
-            status["ecmwf"] = "down"
-    except Exception:
-        status["ecmwf"] = "down"
+    # Check connection to model_repository, refreshing the cached manifest
+    status["ecmwf"] = "up" if await manifest.refresh(timeout=1) else "down"
 
     return StatusResponse(**status)
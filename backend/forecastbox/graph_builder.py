@@ -0,0 +1,111 @@
+# (C) Copyright 2024- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+"""
+Incremental graph construction with node deduplication
+"""
+
+import pickle
+from typing import Any, Hashable
+
+from earthkit.workflows import fluent
+from earthkit.workflows.graph import Graph
+from earthkit.workflows.graph.nodes import Node
+
+
+def _structure(value: Any) -> Hashable:
+    """Get a hashable representation of a value, equal for values equal by structure.
+
+    Containers are represented by their items, other unhashable values by their pickle.
+    """
+    if isinstance(value, dict):
+        return ("dict", frozenset((key, _structure(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(_structure(item) for item in value))
+    try:
+        hash(value)
+    except TypeError:
+        return ("pickle", type(value).__qualname__, pickle.dumps(value))
+    return ("value", value)
+
+
+def _payload_key(payload: Any) -> Hashable:
+    """Get a key under which equal payloads collide."""
+    if isinstance(payload, fluent.Payload):
+        # Payloads compare equal by their string representation
+        return ("payload", str(payload))
+    try:
+        hash(payload)
+    except TypeError:
+        try:
+            return ("structure", _structure(payload))
+        except Exception:
+            # Unpicklable, only deduplicated with itself
+            return ("id", id(payload))
+    return ("value", payload)
+
+
+class GraphBuilder:
+    """Build a graph incrementally, hash-consing nodes as they are added.
+
+    Produces the same graph as concatenating all added graphs and calling
+    `deduplicate_nodes` on the result. Instead of comparing every node
+    against every other node afterwards, each node is looked up by its
+    outputs, inputs and payload as it is added, so duplicates are never kept.
+
+    Like `deduplicate_nodes`, the inputs of added nodes are rewired in place
+    to the deduplicated parents.
+
+    Examples
+    --------
+    >>> builder = GraphBuilder()
+    >>> builder.add(product_graph)
+    >>> builder.add(other_action)
+    >>> graph = builder.graph()
+    """
+
+    def __init__(self):
+        self._nodes: dict[Hashable, Node] = {}
+        self._resolved: dict[Node, Node] = {}
+        self._sinks: dict[Node, None] = {}
+
+    def add(self, graph: "Graph | fluent.Action") -> "GraphBuilder":
+        """Add the nodes of a graph or action."""
+        if isinstance(graph, fluent.Action):
+            graph = graph.graph()
+
+        for node in graph.nodes(forwards=True):
+            self._add_node(node)
+
+        for sink in graph.sinks:
+            self._sinks.setdefault(self._resolved[sink])
+        return self
+
+    def __iadd__(self, graph: "Graph | fluent.Action") -> "GraphBuilder":
+        return self.add(graph)
+
+    def _add_node(self, node: Node) -> None:
+        if node in self._resolved:
+            return
+
+        node.inputs = {iname: self._resolved[src.parent].get_output(src.name) for iname, src in node.inputs.items()}
+        key = (
+            tuple(node.outputs),
+            tuple(sorted((iname, id(src.parent), src.name) for iname, src in node.inputs.items())),
+            _payload_key(node.payload),
+        )
+        self._resolved[node] = self._nodes.setdefault(key, node)
+
+    def graph(self) -> Graph:
+        """Get the deduplicated graph of everything added so far."""
+        return Graph(list(self._sinks))
+
+    def __len__(self) -> int:
+        """Number of unique nodes."""
+        return len(self._nodes)
@@ -0,0 +1,76 @@
+# (C) Copyright 2024- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+"""
+Manipulation of MARS requests
+"""
+
+import json
+from typing import Any
+
+
+def _unique(values: list[Any]) -> list[Any]:
+    return list(dict.fromkeys(values))
+
+
+def coalesce_requests(requests: list[dict[str, Any]], keys: tuple[str, ...]) -> list[tuple[dict[str, Any], list[dict[str, Any]]]]:
+    """Merge requests differing only in the values of `keys` into multi-valued requests.
+
+    Keys already holding several values are left as they are. Requests are merged over all
+    keys only if together they cover every combination of the merged values, so the merged
+    request has the same outputs, otherwise they are merged over the last key only.
+
+    Returns
+    -------
+    list[tuple[dict[str, Any], list[dict[str, Any]]]]
+        Merged requests, with the requests each was merged from
+    """
+    groups: dict[tuple[tuple[str, ...], str], list[dict[str, Any]]] = {}
+    for request in requests:
+        scalar_keys = tuple(key for key in keys if key in request and not isinstance(request[key], (list, tuple)))
+        shape = json.dumps({k: v for k, v in request.items() if k not in scalar_keys}, sort_keys=True, default=str)
+        groups.setdefault((scalar_keys, shape), []).append(request)
+
+    def merge(group: list[dict[str, Any]], scalar_keys: tuple[str, ...]) -> dict[str, Any]:
+        merged = dict(group[0])
+        for key in scalar_keys:
+            values = _unique([request[key] for request in group])
+            merged[key] = values if len(values) > 1 else values[0]
+        return merged
+
+    coalesced = []
+    for (scalar_keys, _), group in groups.items():
+        combinations = 1
+        for key in scalar_keys:
+            combinations *= len(_unique([request[key] for request in group]))
+
+        if combinations == len(_unique([tuple(request[key] for key in scalar_keys) for request in group])):
+            coalesced.append((merge(group, scalar_keys), group))
+            continue
+
+        *outer, last = scalar_keys
+        by_outer: dict[tuple, list[dict[str, Any]]] = {}
+        for request in group:
+            by_outer.setdefault(tuple(request[key] for key in outer), []).append(request)
+        coalesced.extend((merge(sub_group, (last,)), sub_group) for sub_group in by_outer.values())
+    return coalesced
+
+
+def request_key(request: dict[str, Any], keys: tuple[str, ...]) -> str:
+    """Get a key under which requests selecting the same values of `keys` collide.
+
+    The values of `keys` are compared as a set of strings, so that their order,
+    their type and whether a single value is given in a list do not matter.
+    """
+    normalised = dict(request)
+    for key in keys:
+        if key in request:
+            values = request[key] if isinstance(request[key], (list, tuple)) else [request[key]]
+            normalised[key] = sorted(set(map(str, values)))
+    return json.dumps(normalised, sort_keys=True, default=str)
@@ -0,0 +1,249 @@
+# (C) Copyright 2024- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+"""
+Resumable, checksum-verified downloads of model checkpoints
+
+Checkpoints are downloaded into `{destination}.part`, split into byte ranges fetched over
+concurrent connections when the server supports range requests. Progress of each range
+is recorded in a `{destination}.part.json` sidecar, so an interrupted download resumes
+where it stopped. The file is hashed with SHA-256 in order as it is written, and verified
+against the checksum published by the repository as `{url}.sha256` before being moved
+into place.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import httpx
+
+LOG = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+"""Called with the number of bytes downloaded and the total number of bytes."""
+
+Throttle = Callable[[int], Awaitable[None]]
+"""Called with the size of each chunk before it is written, to limit bandwidth."""
+
+STATE_SAVE_INTERVAL = 5.0
+"""Seconds between saves of the download state."""
+
+
+@dataclass
+class Segment:
+    """Byte range of a download"""
+
+    start: int
+    end: int
+    """Exclusive end of the range."""
+    offset: int
+    """Position up to which the range has been downloaded."""
+
+    @property
+    def done(self) -> bool:
+        return self.offset >= self.end
+
+
+@dataclass
+class DownloadState:
+    """Resumable state of a download"""
+
+    url: str
+    total: int
+    etag: str | None
+    segments: list[Segment]
+
+    @property
+    def downloaded(self) -> int:
+        return sum(segment.offset - segment.start for segment in self.segments)
+
+    @classmethod
+    def load(cls, path: Path) -> "DownloadState | None":
+        try:
+            with open(path) as f:
+                state = json.load(f)
+            return cls(**{**state, "segments": [Segment(**segment) for segment in state["segments"]]})
+        except (OSError, ValueError, TypeError, KeyError):
+            return None
+
+    def save(self, path: Path) -> None:
+        with open(path.with_suffix(".tmp"), "w") as f:
+            json.dump(asdict(self), f)
+        os.replace(path.with_suffix(".tmp"), path)
+
+
+def split(total: int, connections: int) -> list[Segment]:
+    """Split `total` bytes into one segment per connection."""
+    size = -(-total // max(connections, 1)) or 1
+    return [Segment(start, min(start + size, total), start) for start in range(0, total, size)]
+
+
+async def fetch_checksum(client: httpx.AsyncClient, url: str) -> str | None:
+    """Get the SHA-256 checksum published for `url`, in `sha256sum` format."""
+    try:
+        response = await client.get(f"{url}.sha256")
+    except httpx.HTTPError as e:
+        LOG.warning(f"Failed to fetch checksum of {url}: {e}")
+        return None
+    if response.status_code != 200:
+        LOG.warning(f"No checksum published for {url}, it will not be verified")
+        return None
+    return response.text.split()[0].lower() if response.text.strip() else None
+
+
+class Hasher:
+    """SHA-256 of a file being written out of order, advanced over the contiguous written prefix.
+
+    Reading and hashing run in a worker thread, so that hashing the prefix of a
+    resumed download does not block the event loop.
+    """
+
+    def __init__(self, fd: int, state: DownloadState, chunk_size: int):
+        self._fd = fd
+        self._state = state
+        self._chunk_size = chunk_size
+        self._sha256 = hashlib.sha256()
+        self._position = 0
+        self._lock = asyncio.Lock()
+
+    def _advance(self) -> None:
+        for segment in self._state.segments:
+            if segment.end <= self._position:
+                continue
+            while self._position < segment.offset:
+                data = os.pread(self._fd, min(self._chunk_size, segment.offset - self._position), self._position)
+                if not data:
+                    raise OSError(f"Unexpected end of file at {self._position}")
+                self._sha256.update(data)
+                self._position += len(data)
+            if not segment.done:
+                return
+
+    async def advance(self) -> None:
+        """Hash what was written since, unless it is already being hashed."""
+        if self._lock.locked():
+            return
+        async with self._lock:
+            await asyncio.to_thread(self._advance)
+
+    async def hexdigest(self) -> str:
+        """Hash the rest of the file and get its digest."""
+        async with self._lock:
+            await asyncio.to_thread(self._advance)
+        return self._sha256.hexdigest()
+
+
+async def _probe(client: httpx.AsyncClient, url: str) -> tuple[int, str | None, bool]:
+    """Get the size, ETag and whether range requests are supported."""
+    response = await client.head(url)
+    response.raise_for_status()
+    total = int(response.headers.get("Content-Length", 0))
+    ranged = response.headers.get("Accept-Ranges", "").lower() == "bytes" and total > 0
+    return total, response.headers.get("ETag"), ranged
+
+
+async def download(
+    url: str,
+    destination: Path,
+    chunk_size: int = 1024**2,
+    connections: int = 4,
+    on_progress: ProgressCallback | None = None,
+    throttle: Throttle | None = None,
+) -> None:
+    """Download `url` to `destination`, resuming a previous partial download of it.
+
+    Raises
+    ------
+    httpx.HTTPError
+        If the download failed, the partial download is kept to be resumed.
+    ValueError
+        If the checksum does not match, the partial download is discarded.
+    """
+    destination = Path(destination)
+    part_path = destination.with_name(destination.name + ".part")
+    state_path = destination.with_name(destination.name + ".part.json")
+
+    async with httpx.AsyncClient(follow_redirects=True, timeout=httpx.Timeout(30.0, read=300.0)) as client:
+        total, etag, ranged = await _probe(client, url)
+        expected = await fetch_checksum(client, url)
+
+        state = DownloadState.load(state_path) if ranged else None
+        if state is None or state.url != url or state.total != total or state.etag != etag or not part_path.exists():
+            state = DownloadState(url, total, etag, split(total, connections if ranged else 1) if total else [Segment(0, 0, 0)])
+            with open(part_path, "wb") as f:
+                f.truncate(total)
+        elif state.downloaded:
+            LOG.info(f"Resuming download of {url} at {state.downloaded}/{total} bytes")
+
+        fd = os.open(part_path, os.O_RDWR)
+        try:
+            hasher = Hasher(fd, state, chunk_size)
+            last_saved = time.monotonic()
+
+            async def fetch(segment: Segment) -> None:
+                nonlocal last_saved
+                headers = {"Range": f"bytes={segment.offset}-{segment.end - 1}"} if ranged else {}
+                if ranged and etag:
+                    headers["If-Range"] = etag
+
+                async with client.stream("GET", url, headers=headers) as response:
+                    response.raise_for_status()
+                    if ranged and response.status_code != 206:
+                        raise httpx.HTTPError(f"Range request of {url} was not honoured")
+
+                    async for chunk in response.aiter_bytes(chunk_size):
+                        if total:
+                            chunk = chunk[: segment.end - segment.offset]
+                        if throttle is not None:
+                            await throttle(len(chunk))
+                        await asyncio.to_thread(os.pwrite, fd, chunk, segment.offset)
+                        segment.offset += len(chunk)
+                        if not total:
+                            segment.end = segment.offset
+                        await hasher.advance()
+
+                        if on_progress is not None:
+                            await on_progress(state.downloaded, total)
+                        if ranged and time.monotonic() - last_saved > STATE_SAVE_INTERVAL:
+                            state.save(state_path)
+                            last_saved = time.monotonic()
+
+                if total and not segment.done:
+                    raise httpx.HTTPError(f"Download of {url} ended early at {segment.offset}/{segment.end}")
+
+            tasks = [asyncio.create_task(fetch(segment)) for segment in state.segments if not segment.done or not total]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+            finally:
+                if ranged:
+                    state.save(state_path)
+
+            digest = await hasher.hexdigest()
+        finally:
+            os.close(fd)
+
+    if expected is not None and digest != expected:
+        part_path.unlink(missing_ok=True)
+        state_path.unlink(missing_ok=True)
+        raise ValueError(f"Checksum mismatch for {url}: expected {expected}, got {digest}")
+
+    os.replace(part_path, destination)
+    state_path.unlink(missing_ok=True)
@@ -0,0 +1,157 @@
+# (C) Copyright 2024- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+"""
+Index of checkpoint metadata
+
+The metadata needed to describe a model is extracted from its checkpoint once, and
+kept next to it as `{checkpoint}.index.json`, so it can be served without opening
+the checkpoint. The index records the size and modification time of the checkpoint
+it was built from, and is rebuilt if the checkpoint changes.
+"""
+
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass, field
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+
+from forecastbox.cache import LRUCache
+
+LOG = logging.getLogger(__name__)
+
+FORECAST_IN_A_BOX_METADATA = "forecast-in-a-box.json"
+
+INDEX_VERSION = 1
+"""Version of the index format, indexes of other versions are rebuilt."""
+
+
+@dataclass
+class CheckpointIndex:
+    """Metadata of a checkpoint"""
+
+    timestep_seconds: float
+    diagnostic_variables: list[str]
+    prognostic_variables: list[str]
+    accumulations: list[str]
+    area: Any
+    grid: Any
+    module_versions: dict[str, str]
+    """Versions of the modules the model was trained with."""
+    extra: dict[str, Any] = field(default_factory=dict)
+    """Contents of the forecast-in-a-box.json metadata, if present."""
+
+    checkpoint_identity: tuple[int, int] = (0, 0)
+    """Modification time in nanoseconds and size of the indexed checkpoint."""
+    version: int = INDEX_VERSION
+
+    @property
+    def timestep(self) -> timedelta:
+        return timedelta(seconds=self.timestep_seconds)
+
+    @property
+    def variables(self) -> list[str]:
+        return [*self.diagnostic_variables, *self.prognostic_variables]
+
+
+INDEXES: LRUCache[str, CheckpointIndex] = LRUCache("checkpoint_index", max_entries=256)
+
+
+def index_path(checkpoint_path: str | os.PathLike) -> Path:
+    checkpoint_path = Path(checkpoint_path)
+    return checkpoint_path.with_name(checkpoint_path.name + ".index.json")
+
+
+def checkpoint_identity(checkpoint_path: str | os.PathLike) -> tuple[int, int]:
+    """Identify the contents of a checkpoint by its modification time in nanoseconds and size.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the checkpoint does not exist.
+    """
+    stat = os.stat(checkpoint_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _jsonable(value: Any) -> Any:
+    return json.loads(json.dumps(value, default=str))
+
+
+def build_index(checkpoint_path: str | os.PathLike) -> CheckpointIndex:
+    """Build the index of a checkpoint by opening it, and save it next to the checkpoint."""
+    from anemoi.inference.checkpoint import Checkpoint
+    from anemoi.utils.checkpoints import has_metadata, load_metadata
+
+    identity = checkpoint_identity(checkpoint_path)
+    ckpt = Checkpoint(str(checkpoint_path))
+
+    extra = {}
+    if has_metadata(str(checkpoint_path), name=FORECAST_IN_A_BOX_METADATA):
+        extra = load_metadata(str(checkpoint_path), name=FORECAST_IN_A_BOX_METADATA)
+
+    index = CheckpointIndex(
+        timestep_seconds=ckpt.timestep.total_seconds(),
+        diagnostic_variables=list(ckpt.diagnostic_variables),
+        prognostic_variables=list(ckpt.prognostic_variables),
+        accumulations=list(ckpt.accumulations),
+        area=_jsonable(ckpt.area),
+        grid=_jsonable(ckpt.grid),
+        module_versions=_jsonable(ckpt.provenance_training().get("module_versions", {})),
+        extra=_jsonable(extra),
+        checkpoint_identity=identity,
+    )
+
+    path = index_path(checkpoint_path)
+    try:
+        with open(path.with_suffix(".tmp"), "w") as f:
+            json.dump(asdict(index), f)
+        os.replace(path.with_suffix(".tmp"), path)
+    except OSError as e:
+        LOG.warning(f"Failed to save the index of {checkpoint_path}: {e}")
+
+    INDEXES.put(str(checkpoint_path), index)
+    return index
+
+
+def _load_index(checkpoint_path: str | os.PathLike, identity: tuple[int, int]) -> CheckpointIndex | None:
+    try:
+        with open(index_path(checkpoint_path)) as f:
+            data = json.load(f)
+        index = CheckpointIndex(**{**data, "checkpoint_identity": tuple(data["checkpoint_identity"])})
+    except (OSError, ValueError, TypeError, KeyError):
+        return None
+
+    if index.version != INDEX_VERSION or index.checkpoint_identity != identity:
+        return None
+    return index
+
+
+def get_index(checkpoint_path: str | os.PathLike) -> CheckpointIndex:
+    """Get the index of a checkpoint, building it if missing or outdated."""
+    identity = checkpoint_identity(checkpoint_path)
+
+    index = INDEXES.get(str(checkpoint_path))
+    if index is not None and index.checkpoint_identity == identity:
+        return index
+
+    index = _load_index(checkpoint_path, identity)
+    if index is None:
+        return build_index(checkpoint_path)
+
+    INDEXES.put(str(checkpoint_path), index)
+    return index
+
+
+def remove_index(checkpoint_path: str | os.PathLike) -> None:
+    """Remove the index of a checkpoint, when the checkpoint is deleted."""
+    INDEXES.pop(str(checkpoint_path))
+    index_path(checkpoint_path).unlink(missing_ok=True)
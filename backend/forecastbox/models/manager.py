@@ -0,0 +1,234 @@
+# (C) Copyright 2024- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+"""
+Queue of model checkpoint downloads
+
+Downloads are queued by priority, then in order of submission, and run by a bounded
+pool of workers. Failed downloads are retried with exponential backoff, resuming from
+what was already downloaded, and all downloads share an optional bandwidth cap.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from pathlib import Path
+from typing import Any, Callable, Literal
+
+from forecastbox.db import async_db as db
+from forecastbox.models.download import download
+from forecastbox.models.index import build_index
+from forecastbox.settings import API_SETTINGS
+
+LOG = logging.getLogger(__name__)
+
+DownloadStatus = Literal["queued", "in_progress", "errored", "completed", "cancelled"]
+
+
+class DownloadJob:
+    """A model download, with its progress tracked in memory.
+
+    Progress is written through to the `model_downloads` collection at most every
+    `API_SETTINGS.download_progress_interval` seconds, or every
+    `API_SETTINGS.download_progress_step` percent, whichever comes first.
+    """
+
+    def __init__(self, download_id: str, model_id: str, url: str, path: Path, priority: int):
+        self.download_id = download_id
+        self.model_id = model_id
+        self.url = url
+        self.path = path
+        self.priority = priority
+
+        self.status: DownloadStatus = "queued"
+        self.progress = 0.0
+        self.error: str | None = None
+        self.attempts = 0
+        self.task: asyncio.Task | None = None
+
+        self._written_at = time.monotonic()
+        self._written_progress = 0.0
+
+    async def update(self, downloaded: int, total: int) -> None:
+        self.progress = round(downloaded / total * 100, 2) if total else 0.0
+
+        if (
+            time.monotonic() - self._written_at >= API_SETTINGS.download_progress_interval
+            or self.progress - self._written_progress >= API_SETTINGS.download_progress_step
+        ):
+            await self.write({"progress": self.progress})
+
+    async def finish(self, error: str | None = None) -> None:
+        self.status = "errored" if error else "completed"
+        self.error = error
+        if not error:
+            self.progress = 100.0
+        await self.write({"status": self.status, "progress": self.progress, "error": error})
+
+    async def write(self, update: dict[str, Any]) -> None:
+        self._written_at = time.monotonic()
+        self._written_progress = self.progress
+        await db.get_collection("model_downloads").update_one({"_id": self.download_id}, {"$set": update})
+
+
+class BandwidthLimiter:
+    """Token bucket shared by all downloads, capping them at `API_SETTINGS.model_download_bandwidth` bytes per second."""
+
+    def __init__(self):
+        self._allowance = 0.0
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def __call__(self, size: int) -> None:
+        rate = API_SETTINGS.model_download_bandwidth
+        if not rate:
+            return
+
+        async with self._lock:
+            now = time.monotonic()
+            self._allowance = min(float(rate), self._allowance + (now - self._last) * rate) - size
+            self._last = now
+            if self._allowance < 0:
+                await asyncio.sleep(-self._allowance / rate)
+
+
+class DownloadManager:
+    """Bounded pool of workers running queued model downloads."""
+
+    def __init__(self):
+        self.jobs: dict[str, DownloadJob] = {}
+        """Downloads submitted to this process, by model id."""
+
+        self._queue: asyncio.PriorityQueue[tuple[int, int, str]] = asyncio.PriorityQueue()
+        self._order = itertools.count()
+        self._workers: list[asyncio.Task] = []
+        self._limiter = BandwidthLimiter()
+        self._on_downloaded: list[Callable[[Path], Any]] = []
+
+    def on_downloaded(self, func: Callable[[Path], Any]) -> Callable[[Path], Any]:
+        """Register a function to call, in a thread, with the path of each completed download."""
+        self._on_downloaded.append(func)
+        return func
+
+    def submit(self, download_id: str, model_id: str, url: str, path: Path, priority: int = 0) -> DownloadJob:
+        """Queue a download, lower priorities being downloaded first."""
+        job = self.jobs[model_id] = DownloadJob(download_id, model_id, url, path, priority)
+        self._queue.put_nowait((priority, next(self._order), model_id))
+        self._start_workers()
+        return job
+
+    def _start_workers(self) -> None:
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        while len(self._workers) < API_SETTINGS.model_download_workers:
+            self._workers.append(asyncio.create_task(self._work()))
+
+    async def _work(self) -> None:
+        while True:
+            _, _, model_id = await self._queue.get()
+            try:
+                job = self.jobs.get(model_id)
+                if job is None or job.status != "queued":
+                    continue
+                job.task = asyncio.create_task(self._run(job))
+                try:
+                    await job.task
+                except asyncio.CancelledError:
+                    if job.status != "cancelled":
+                        raise
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: DownloadJob) -> None:
+        job.status = "in_progress"
+        while True:
+            job.attempts += 1
+            try:
+                await download(
+                    job.url,
+                    job.path,
+                    chunk_size=API_SETTINGS.model_download_chunk_size,
+                    connections=API_SETTINGS.model_download_connections,
+                    on_progress=job.update,
+                    throttle=self._limiter,
+                )
+            except asyncio.CancelledError:
+                raise
+            except ValueError as e:
+                # Checksum mismatch, retrying would download the same file
+                await job.finish(error=str(e))
+                return
+            except Exception as e:
+                if job.attempts > API_SETTINGS.model_download_retries:
+                    await job.finish(error=str(e))
+                    return
+                delay = API_SETTINGS.model_download_backoff * 2 ** (job.attempts - 1)
+                LOG.warning(f"Download of {job.model_id} failed, retrying in {delay}s: {e}")
+                job.error = str(e)
+                await asyncio.sleep(delay)
+            else:
+                try:
+                    await asyncio.to_thread(build_index, job.path)
+                except Exception as e:
+                    LOG.warning(f"Failed to index {job.path}, it will be indexed on first use: {e}")
+                await job.finish()
+                for callback in self._on_downloaded:
+                    try:
+                        await asyncio.to_thread(callback, job.path)
+                    except Exception as e:
+                        LOG.warning(f"Failed to run {callback.__name__} for {job.path}: {e}")
+                return
+
+    def get(self, model_id: str) -> DownloadJob | None:
+        return self.jobs.get(model_id)
+
+    async def cancel(self, model_id: str) -> DownloadJob | None:
+        """Cancel a queued or running download, discarding what was downloaded."""
+        job = self.jobs.get(model_id)
+        if job is None or job.status not in ("queued", "in_progress"):
+            return None
+
+        del self.jobs[model_id]
+        job.status = "cancelled"
+        if job.task is not None and not job.task.done():
+            job.task.cancel()
+            await asyncio.gather(job.task, return_exceptions=True)
+
+        for suffix in (".part", ".part.json"):
+            job.path.with_name(job.path.name + suffix).unlink(missing_ok=True)
+        return job
+
+    def forget(self, model_id: str) -> None:
+        """Forget a finished download."""
+        job = self.jobs.get(model_id)
+        if job is not None and job.status not in ("queued", "in_progress"):
+            del self.jobs[model_id]
+
+    async def stop(self) -> None:
+        """Stop all workers, interrupting running downloads so they resume on the next submission.
+
+        Unfinished downloads are recorded as errored, so they are restarted when next requested.
+        """
+        for worker in self._workers:
+            worker.cancel()
+        for job in self.jobs.values():
+            if job.task is not None:
+                job.task.cancel()
+        await asyncio.gather(*self._workers, *(job.task for job in self.jobs.values() if job.task is not None), return_exceptions=True)
+        self._workers.clear()
+
+        for job in self.jobs.values():
+            if job.status in ("queued", "in_progress"):
+                try:
+                    await job.finish(error="Interrupted by shutdown")
+                except Exception as e:
+                    LOG.warning(f"Failed to record interrupted download of {job.model_id}: {e}")
+
+
+DOWNLOAD_MANAGER = DownloadManager()
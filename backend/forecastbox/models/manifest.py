@@ -0,0 +1,145 @@
+# (C) Copyright 2024- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+"""
+Cached MANIFEST of the model repository
+
+The manifest is kept in memory and on disk under `API_SETTINGS.data_path`, and served
+from there immediately. Once older than `API_SETTINGS.manifest_ttl` it is refreshed
+in the background with a conditional GET. In offline mode, the repository is never
+contacted and only the cached manifest is served.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import httpx
+
+from forecastbox.settings import API_SETTINGS
+
+LOG = logging.getLogger(__name__)
+
+
+@dataclass
+class Manifest:
+    """MANIFEST of the model repository"""
+
+    repository: str
+    models: list[str]
+    """Models as `{category}/{name}`."""
+    etag: str | None = None
+    last_modified: str | None = None
+    fetched_at: float = field(default_factory=time.time)
+    """Time the manifest was last confirmed against the repository."""
+
+    @property
+    def stale(self) -> bool:
+        return time.time() - self.fetched_at > API_SETTINGS.manifest_ttl
+
+
+_manifest: Manifest | None = None
+_refreshing: asyncio.Task | None = None
+
+
+def manifest_path() -> Path:
+    return Path(API_SETTINGS.data_path) / "MANIFEST.json"
+
+
+def _load() -> Manifest | None:
+    try:
+        with open(manifest_path()) as f:
+            manifest = Manifest(**json.load(f))
+    except (OSError, ValueError, TypeError):
+        return None
+    return manifest if manifest.repository == API_SETTINGS.model_repository else None
+
+
+def _save(manifest: Manifest) -> None:
+    path = manifest_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path.with_suffix(".tmp"), "w") as f:
+            json.dump(asdict(manifest), f)
+        os.replace(path.with_suffix(".tmp"), path)
+    except OSError as e:
+        LOG.warning(f"Failed to save model manifest: {e}")
+
+
+async def refresh(timeout: float = 10.0) -> bool:
+    """Refresh the manifest from the repository, returning whether the repository could be reached.
+
+    Sends a conditional GET if a manifest is cached, so an unchanged manifest is not transferred again.
+    """
+    global _manifest
+
+    if API_SETTINGS.offline:
+        return False
+
+    repository = API_SETTINGS.model_repository
+    cached = _manifest if _manifest is not None and _manifest.repository == repository else _load()
+
+    headers = {}
+    if cached is not None and cached.etag:
+        headers["If-None-Match"] = cached.etag
+    if cached is not None and cached.last_modified:
+        headers["If-Modified-Since"] = cached.last_modified
+
+    try:
+        async with httpx.AsyncClient(follow_redirects=True) as client:
+            response = await client.get(f"{repository.removesuffix('/')}/MANIFEST", headers=headers, timeout=timeout)
+    except httpx.HTTPError as e:
+        LOG.warning(f"Failed to fetch model manifest from {repository}: {e}")
+        return False
+
+    if response.status_code == 304 and cached is not None:
+        cached.fetched_at = time.time()
+        manifest = cached
+    elif response.status_code == 200:
+        manifest = Manifest(
+            repository=repository,
+            models=[line.strip() for line in response.text.splitlines() if line.strip()],
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+    else:
+        LOG.warning(f"Failed to fetch model manifest from {repository}: {response.status_code}")
+        return False
+
+    _manifest = manifest
+    await asyncio.to_thread(_save, manifest)
+    return True
+
+
+def _refresh_in_background() -> None:
+    global _refreshing
+    if _refreshing is None or _refreshing.done():
+        _refreshing = asyncio.create_task(refresh())
+
+
+async def get_manifest() -> Manifest | None:
+    """Get the manifest, from cache if possible.
+
+    A stale cached manifest is returned immediately and refreshed in the background.
+    Returns None if no manifest is cached and the repository cannot be reached.
+    """
+    global _manifest
+
+    if _manifest is None or _manifest.repository != API_SETTINGS.model_repository:
+        _manifest = await asyncio.to_thread(_load)
+
+    if _manifest is None:
+        await refresh()
+    elif _manifest.stale and not API_SETTINGS.offline:
+        _refresh_in_background()
+    return _manifest
@@ -7,8 +7,9 @@
 # granted to it by virtue of its status as an intergovernmental organisation
 # nor does it submit to any jurisdiction.
 
+import json
 from collections import defaultdict
-from functools import cached_property, lru_cache
+from functools import cached_property
 
 from pydantic import BaseModel, FilePath
 
@@ -20,14 +21,30 @@ from earthkit.workflows.fluent import Action
 from earthkit.workflows.plugins.anemoi.fluent import from_input
 from anemoi.inference.checkpoint import Checkpoint
 
+from forecastbox.cache import LRUCache
+from forecastbox.models.index import CheckpointIndex, get_index
+from forecastbox.settings import API_SETTINGS
 
-FORECAST_IN_A_BOX_METADATA = "forecast-in-a-box.json"
 
-
-@lru_cache
 def open_checkpoint(checkpoint_path: str) -> Checkpoint:
-    """Open a checkpoint from the given path."""
-    return Checkpoint(checkpoint_path)
+    """Open a checkpoint from the given path.
+
+    Checkpoints are not kept open. Model metadata is served from the checkpoint
+    index, so a checkpoint is only opened to build its index or run the model.
+    """
+    return Checkpoint(str(checkpoint_path))
+
+
+MODEL_QUBES: LRUCache[tuple[str, tuple[int, int], str], Qube] = LRUCache("model_qube", max_entries=API_SETTINGS.model_qube_cache_size)
+"""Model Qubes by checkpoint path, checkpoint identity and assumptions.
+
+Qubes are shared between callers, which must not modify them in place.
+"""
+
+
+def forget_model(checkpoint_path: str) -> None:
+    """Drop everything held in memory for a checkpoint, when it is deleted."""
+    MODEL_QUBES.invalidate(lambda key: key[0] == str(checkpoint_path))
 
 
 class ModelExtra(BaseModel):
@@ -59,6 +76,11 @@ class Model(BaseModel):
     def checkpoint(self) -> Checkpoint:
         return open_checkpoint(self.checkpoint_path)
 
+    @cached_property
+    def index(self) -> CheckpointIndex:
+        """Index of the checkpoint metadata."""
+        return get_index(self.checkpoint_path)
+
     @cached_property
     def extra_information(self) -> ModelExtra:
         """Get the extra information for the model."""
@@ -66,20 +88,17 @@ class Model(BaseModel):
 
     @cached_property
     def timesteps(self) -> list[int]:
-        model_step = int((self.checkpoint.timestep.total_seconds() + 1) // 3600)
+        model_step = int((self.index.timestep_seconds + 1) // 3600)
         return list(range(model_step, int(self.lead_time) + 1, model_step))
 
     @cached_property
     def variables(self) -> list[str]:
-        return [
-            *self.checkpoint.diagnostic_variables,
-            *self.checkpoint.prognostic_variables,
-        ]
+        return self.index.variables
 
     @cached_property
     def accumulations(self) -> list[str]:
         return [
-            *self.checkpoint.accumulations,
+            *self.index.accumulations,
         ]
 
     def qube(self, assumptions: dict[str, Any] | None = None) -> Qube:
@@ -91,7 +110,9 @@ class Model(BaseModel):
         as 'levelist'. Which differs from the graph where each param and level
         are represented as separate nodes.
         """
-        return convert_to_model_spec(self.checkpoint, assumptions=assumptions)
+        index = self.index
+        key = (str(self.checkpoint_path), index.checkpoint_identity, json.dumps(assumptions or {}, sort_keys=True, default=str))
+        return MODEL_QUBES.get_or_create(key, lambda: convert_to_model_spec(index, assumptions=assumptions))
 
     def graph(self, initial_conditions: "Action", **kwargs) -> "Action":
         """Get Model Graph.
@@ -172,7 +193,7 @@ class Model(BaseModel):
 def model_versions(checkpoint_path: str, filter: bool = True) -> dict[str, str]:
     """Get the versions of the model"""
 
-    ckpt = open_checkpoint(checkpoint_path)
+    index = get_index(checkpoint_path)
 
     def parse_versions(key, val):
         if key.startswith("_"):
@@ -184,7 +205,7 @@ def model_versions(checkpoint_path: str, filter: bool = True) -> dict[str, str]:
 
     versions = {
         key: val
-        for key, val in (parse_versions(key, val) for key, val in ckpt.provenance_training()["module_versions"].items())
+        for key, val in (parse_versions(key, val) for key, val in index.module_versions.items())
         if key is not None and val is not None
     }
 
@@ -197,33 +218,26 @@ def model_versions(checkpoint_path: str, filter: bool = True) -> dict[str, str]:
 
 
 def model_info(checkpoint_path: str) -> dict[str, Any]:
-    ckpt = open_checkpoint(checkpoint_path)
+    index = get_index(checkpoint_path)
 
     return {
-        "timestep": ckpt.timestep,
-        "diagnostics": ckpt.diagnostic_variables,
-        "prognostics": ckpt.prognostic_variables,
-        "area": ckpt.area,
+        "timestep": index.timestep,
+        "diagnostics": index.diagnostic_variables,
+        "prognostics": index.prognostic_variables,
+        "area": index.area,
         "local_area": True,
-        "grid": ckpt.grid,
+        "grid": index.grid,
         "versions": model_versions(checkpoint_path),
     }
 
 
 def get_extra_information(checkpoint_path: str) -> ModelExtra:
-    from anemoi.utils.checkpoints import has_metadata, load_metadata
-
-    if not has_metadata(checkpoint_path, name=FORECAST_IN_A_BOX_METADATA):
-        return ModelExtra()
-    return load_metadata(checkpoint_path, name=FORECAST_IN_A_BOX_METADATA)
+    return ModelExtra(**get_index(checkpoint_path).extra)
 
 
-def convert_to_model_spec(ckpt: Checkpoint, assumptions: dict[str, Any] | None = None) -> Qube:
-    """Convert an anemoi checkpoint to a Qube."""
-    variables = [
-        *ckpt.diagnostic_variables,
-        *ckpt.prognostic_variables,
-    ]
+def convert_to_model_spec(ckpt: CheckpointIndex, assumptions: dict[str, Any] | None = None) -> Qube:
+    """Convert the index of an anemoi checkpoint to a Qube."""
+    variables = ckpt.variables
 
     assumptions = assumptions or {}
 
@@ -237,27 +251,33 @@ def convert_to_model_spec(ckpt: Checkpoint, assumptions: dict[str, Any] | None =
             variable, level = v.split("_")
             level_variables[variable].append(int(level))
 
-    model_tree = Qube.empty()
-
+    # Group pressure variables sharing the same levels, so each group is a single datacube
+    level_groups = defaultdict(list)
     for variable, levels in level_variables.items():
-        model_tree = model_tree | Qube.from_datacube(
-            {
-                "frequency": ckpt.timestep,
-                "levtype": "pl",
-                "param": variable,
-                "levelist": list(map(str, sorted(map(int, levels)))),
-                **assumptions,
-            }
-        )
-
-    for variable in surface_variables:
-        model_tree = model_tree | Qube.from_datacube(
+        level_groups[tuple(sorted(set(levels)))].append(variable)
+
+    datacubes = [
+        {
+            "frequency": ckpt.timestep,
+            "levtype": "pl",
+            "param": group,
+            "levelist": list(map(str, levels)),
+            **assumptions,
+        }
+        for levels, group in level_groups.items()
+    ]
+    if surface_variables:
+        datacubes.append(
             {
                 "frequency": ckpt.timestep,
                 "levtype": "sfc",
-                "param": variable,
+                "param": surface_variables,
                 **assumptions,
             }
         )
 
+    model_tree = Qube.empty()
+    for datacube in datacubes:
+        model_tree = model_tree | Qube.from_datacube(datacube)
+
     return model_tree
@@ -0,0 +1,117 @@
+# (C) Copyright 2024- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+"""
+Solver of product configurations
+
+The Qube of a product intersected with a model is indexed once, as the set of its
+root to leaf paths. For every axis value, the paths through a node holding that value
+are recorded as a bitmask, so a selection is answered with a few bitwise operations
+per selected key rather than by selecting from the Qube.
+
+Selections follow `Qube.select` in relaxed mode: paths without a selected key are kept,
+and keys which accept `USER_DEFINED` values are not selected on.
+"""
+
+from collections import defaultdict
+from typing import Any
+
+from qubed import Qube
+
+from forecastbox.cache import LRUCache
+from forecastbox.settings import API_SETTINGS
+
+from .product import USER_DEFINED
+
+
+class Selection:
+    """Paths of a Qube remaining after a selection"""
+
+    def __init__(self, solver: "ConfigurationSolver", mask: int, selected: dict[str, set[str]]):
+        self._solver = solver
+        self._mask = mask
+        self._selected = selected
+
+    def span(self, key: str) -> set[Any]:
+        """Values `key` takes in the selection."""
+        selected = self._selected.get(key)
+        return {
+            value
+            for value, paths in self._solver._values.get(key, {}).items()
+            if paths & self._mask and (selected is None or value in selected)
+        }
+
+    def axes(self) -> dict[str, set[Any]]:
+        """Values of all keys in the selection, in the order of `Qube.axes`."""
+        axes = {}
+        for key, paths in self._solver._order:
+            if key not in axes and paths & self._mask:
+                axes[key] = self.span(key)
+        return axes
+
+
+class ConfigurationSolver:
+    """Index of the values of a Qube, to find the values available under a partial selection."""
+
+    def __init__(self, qube: Qube):
+        self._values: dict[str, dict[Any, int]] = defaultdict(dict)
+        """Paths through each value of each key, as bitmasks."""
+        self._present: dict[str, int] = defaultdict(int)
+        """Paths through each key, as bitmasks."""
+        self._order: list[tuple[str, int]] = []
+        """Keys of the nodes in post-order, with the paths through them."""
+
+        self._paths = 0
+        self._all = self._index(qube)
+
+    def _index(self, node: Qube) -> int:
+        if node.children:
+            paths = 0
+            for child in node.children:
+                paths |= self._index(child)
+        elif node.key != "root":
+            paths = 1 << self._paths
+            self._paths += 1
+        else:
+            return 0
+
+        if node.key != "root":
+            values = self._values[node.key]
+            for value in node.values:
+                values[value] = values.get(value, 0) | paths
+            self._present[node.key] |= paths
+            self._order.append((node.key, paths))
+        return paths
+
+    def select(self, params: dict[str, Any]) -> Selection:
+        """Select `params` in order, as `Qube.select` would, skipping empty and open ended keys."""
+        mask = self._all
+        selected: dict[str, set[str]] = {}
+
+        for key, val in params.items():
+            if not val:
+                continue
+            values = self._values.get(key, {})
+            if values.get(USER_DEFINED, 0) & mask:
+                # Dont select if open ended
+                continue
+
+            val = set(map(str, val)) if isinstance(val, (list, tuple)) else {str(val)}
+            allowed = 0
+            for value in val:
+                allowed |= values.get(value, 0)
+
+            mask &= allowed | ~self._present.get(key, 0)
+            selected[key] = val
+
+        return Selection(self, mask, selected)
+
+
+CONFIGURATIONS: LRUCache[tuple, ConfigurationSolver] = LRUCache("product_configuration", max_entries=API_SETTINGS.configuration_cache_size)
+"""Configuration solvers by product, checkpoint path, checkpoint identity and model specification."""
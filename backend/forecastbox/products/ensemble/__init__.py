@@ -7,10 +7,27 @@
 # granted to it by virtue of its status as an intergovernmental organisation
 # nor does it submit to any jurisdiction.
 
+import functools
+from pathlib import Path
+from typing import Any
+
+import yaml
+
 from forecastbox.products.registry import CategoryRegistry
 
 ensemble_registry = CategoryRegistry("ensemble", "Capture the distribution of the ensemble", "Ensemble")
 
+
+@functools.cache
+def load_definitions(name: str) -> list[dict[str, Any]]:
+    """Load a definition file from `definitions/`, parsing it only once.
+
+    The definitions are shared, copy them before modifying them.
+    """
+    with open(Path(__file__).parent / "definitions" / name) as f:
+        return yaml.safe_load(f)
+
+
 from .base import BaseEnsembleProduct  # noqa: F401, E402
 from . import threshold, quantiles, ens_stats  # noqa: F401, E402
 
@@ -7,6 +7,7 @@
 # granted to it by virtue of its status as an intergovernmental organisation
 # nor does it submit to any jurisdiction.
 
+from functools import cached_property
 from typing import Any
 
 import itertools
@@ -27,7 +28,7 @@ class BaseEnsembleStats(BasePProcEnsembleProduct, GenericTemporalProduct):
         "param": True,
     }
 
-    @property
+    @cached_property
     def qube(self):
         return self.make_generic_qube()
 
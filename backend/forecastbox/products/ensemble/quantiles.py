@@ -7,12 +7,10 @@
 # granted to it by virtue of its status as an intergovernmental organisation
 # nor does it submit to any jurisdiction.
 
-from pathlib import Path
+from functools import cached_property
 from typing import Any
 
-import yaml
-
-from . import ensemble_registry
+from . import ensemble_registry, load_definitions
 from ..product import GenericTemporalProduct, USER_DEFINED
 from ..generic import generic_registry
 
@@ -80,12 +78,10 @@ class BaseQuantiles(BasePProcEnsembleProduct, GenericTemporalProduct):
 
 @ensemble_registry("Quantiles")
 class DefinedQuantiles(BaseQuantiles):
-    @property
+    @cached_property
     def qube(self):
-        defined = yaml.safe_load(open(Path(__file__).parent / "definitions/quantiles.yaml"))
-
         q = Qube.empty()
-        for d in defined:
+        for d in load_definitions("quantiles.yaml"):
             q = q | Qube.from_datacube({"frequency": "*", **d})
         return q.compress()
 
@@ -96,6 +92,6 @@ class GenericQuantiles(BaseQuantiles):
         "quantile": "99.0, 99.5",
     }
 
-    @property
+    @cached_property
     def qube(self):
         return self.make_generic_qube(quantile=USER_DEFINED)
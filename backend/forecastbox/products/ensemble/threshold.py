@@ -7,15 +7,14 @@
 # granted to it by virtue of its status as an intergovernmental organisation
 # nor does it submit to any jurisdiction.
 
-from pathlib import Path
+import functools
+from functools import cached_property
 from typing import Any
 
-import yaml
-
 from qubed import Qube
 from earthkit.workflows import fluent
 
-from . import ensemble_registry
+from . import ensemble_registry, load_definitions
 from ..product import GenericParamProduct, USER_DEFINED
 from ..generic import generic_registry
 
@@ -23,6 +22,58 @@ from forecastbox.products.definitions import DESCRIPTIONS, LABELS
 from forecastbox.products.ensemble.base import BasePProcEnsembleProduct, BaseEnsembleProduct
 
 
+ThresholdKey = tuple[str | None, str, str | None, str, float]
+"""Levtype, param, level, operator and numeric threshold of a threshold probability."""
+
+
+def _as_list(value: Any) -> list[Any]:
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def threshold_key(levtype: str | None, param: str, levelist: str | None, operator: str, threshold: str | float) -> ThresholdKey:
+    """Key of a threshold probability, with the threshold compared as a number so `"10"` matches `"10.0"`."""
+    return levtype, str(param), None if levelist is None else str(levelist), operator, float(threshold)
+
+
+class ThresholdIndex:
+    """Threshold probability definitions, compiled for lookup.
+
+    Definitions of several params or levels are expanded to each of them, and pressure level
+    definitions are also indexed without their level, for requests not giving one.
+    The first definition of a key takes precedence.
+    """
+
+    def __init__(self, definitions: list[dict[str, Any]]):
+        self.paramids: dict[ThresholdKey, int] = {}
+        """Output paramid of each threshold probability."""
+        self.datacubes: list[dict[str, Any]] = []
+        """Definitions with their thresholds only, to build a Qube from."""
+
+        for defi in definitions:
+            thresholds = [threshold for threshold, _ in defi["threshold"]]
+            self.datacubes.append({**defi, "threshold": thresholds})
+
+            levels = _as_list(defi.get("levelist")) if defi["levtype"] == "pl" else []
+            for param in _as_list(defi["param"]):
+                for threshold, paramid in defi["threshold"]:
+                    for levelist in [*levels, None]:
+                        self.paramids.setdefault(threshold_key(defi["levtype"], param, levelist, defi["operator"], threshold), paramid)
+
+    def get(self, levtype: str | None, param: str, levelist: str | None, threshold: str | float, operator: str) -> int | None:
+        """Get the output paramid of a threshold probability, if defined."""
+        try:
+            key = threshold_key(levtype, param, levelist if levtype == "pl" else None, operator, threshold)
+        except (TypeError, ValueError):
+            return None
+        return self.paramids.get(key)
+
+
+@functools.cache
+def threshold_index() -> ThresholdIndex:
+    """Get the index of the defined threshold probabilities, compiled on first use."""
+    return ThresholdIndex(load_definitions("threshold_probability.yaml"))
+
+
 class BaseThresholdProbability(BaseEnsembleProduct):
     """Base Threshold Probability Product"""
 
@@ -50,7 +101,7 @@ class GenericThresholdProbability(BaseThresholdProbability, GenericParamProduct)
         "param": True,
     }
 
-    @property
+    @cached_property
     def qube(self):
         return self.make_generic_qube(threshold=USER_DEFINED, operator=USER_DEFINED, step=USER_DEFINED)
 
@@ -78,32 +129,16 @@ class GenericThresholdProbability(BaseThresholdProbability, GenericParamProduct)
 class DefinedThresholdProbability(BaseThresholdProbability, BasePProcEnsembleProduct):
     @property
     def defined(self) -> list[dict[str, Any]]:
-        return yaml.safe_load(open(Path(__file__).parent / "definitions/threshold_probability.yaml"))
+        return load_definitions("threshold_probability.yaml")
 
     @property
-    def thresholds(self):
-        defined = self.defined
-        for defi in defined:
-            defi["threshold"] = list((x[0] for x in defi["threshold"]))
-        return defined
+    def thresholds(self) -> list[dict[str, Any]]:
+        return threshold_index().datacubes
 
     def get_out_paramid(self, levtype, param, levlist, threshold, operator) -> int | None:
-        defined = self.defined
-        for defi in defined:
-            if all(
-                [
-                    defi["levtype"] == levtype,
-                    defi["param"] == param,
-                    (defi["levlist"] == levlist) if levlist and levtype == "pl" else True,
-                    defi["operator"] == operator,
-                ]
-            ):
-                for thres in defi["threshold"]:
-                    if thres[0] == threshold:
-                        return thres[1]
-        return None
+        return threshold_index().get(levtype, param, levlist, threshold, operator)
 
-    @property
+    @cached_property
     def qube(self):
         q = Qube.empty()
         for d in self.thresholds:
@@ -125,14 +160,21 @@ class DefinedThresholdProbability(BaseThresholdProbability, BasePProcEnsemblePro
         step = product_spec["step"]
         levtype = product_spec.get("levtype", None)
 
-        paramid = self.get_out_paramid(levtype, param, product_spec.get("levlist", None), threshold, operator)
-        if paramid is None:
-            raise KeyError(f"Could not identify output paramid for {param!r} with threshold {threshold!r} and operator {operator!r}.")
-
-        request = {
-            "type": "ep",
-            "levtype": levtype,
-            "param": paramid,
-            "step": step,
-        }
-        return request
+        levelist = product_spec.get("levelist", product_spec.get("levlist", None))
+
+        requests = []
+        for para in _as_list(param):
+            for thres in _as_list(threshold):
+                paramid = self.get_out_paramid(levtype, para, levelist, thres, operator)
+                if paramid is None:
+                    raise KeyError(f"Could not identify output paramid for {para!r} with threshold {thres!r} and operator {operator!r}.")
+
+                requests.append(
+                    {
+                        "type": "ep",
+                        "levtype": levtype,
+                        "param": paramid,
+                        "step": step,
+                    }
+                )
+        return requests[0] if len(requests) == 1 else requests
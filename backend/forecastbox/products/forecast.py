@@ -10,6 +10,7 @@
 from .registry import CategoryRegistry
 
 
+from functools import cached_property
 from typing import Any, TYPE_CHECKING
 from .product import GenericParamProduct
 
@@ -41,7 +42,7 @@ class BaseForecast(GenericParamProduct):
     def model_assumptions(self):
         return {"step": "*"}
 
-    @property
+    @cached_property
     def qube(self):
         return self.make_generic_qube(step=["0-24", "0-168"])
 
@@ -7,6 +7,8 @@
 # granted to it by virtue of its status as an intergovernmental organisation
 # nor does it submit to any jurisdiction.
 
+import copy
+import logging
 from abc import abstractmethod
 from pathlib import Path
 from typing import Any
@@ -15,23 +17,38 @@ from earthkit.workflows import fluent
 
 from earthkit.workflows.plugins.pproc.fluent import Action as ppAction
 from earthkit.workflows.plugins.pproc.templates import derive_template
-from earthkit.workflows.graph import Graph, deduplicate_nodes
+from earthkit.workflows.graph import Graph
 
+from forecastbox.cache import LRUCache
+from forecastbox.graph_builder import GraphBuilder
+from forecastbox.mars import coalesce_requests, request_key
 from forecastbox.models import Model
 from forecastbox.products.product import Product
 from forecastbox.settings import FIABSettings
 
 from earthkit.workflows.plugins.anemoi.fluent import ENSEMBLE_DIMENSION_NAME
 
+LOG = logging.getLogger(__name__)
+
 settings = FIABSettings()
 
+TEMPLATES: LRUCache[tuple[str, str], Any] = LRUCache("pproc_template", max_entries=256)
+"""Configurations derived by pproc, by request and schema."""
+
+
+def get_template(request: dict, pproc_schema: str) -> Any:
+    """Derive the pproc configuration of a request, only once for each request and schema.
+
+    Requests are keyed by their values irrespective of order and type, so that
+    the same selection of params and steps reuses its template whichever
+    product or request it comes from.
+    """
+    key = (request_key(request, PProcProduct.coalesce_keys), str(pproc_schema))
+    return copy.deepcopy(TEMPLATES.get_or_create(key, lambda: derive_template(request, pproc_schema)))
 
-def from_request(request: dict, pproc_schema: str, action_kwargs: dict[str, Any] | None = None, **sources: fluent.Action) -> fluent.Action:
-    inputs = []
-    for source in sources.values():
-        inputs.append({k: list(source.nodes.coords[k].values) for k in source.nodes.coords.keys()})
 
-    config = derive_template(request, pproc_schema)
+def from_request(request: dict, pproc_schema: str, action_kwargs: dict[str, Any] | None = None, **sources: fluent.Action) -> fluent.Action:
+    config = get_template(request, pproc_schema)
     return config.action(**(action_kwargs or {}), **sources)
 
 
@@ -46,6 +63,9 @@ class PProcProduct(Product):
         """
         pass
 
+    coalesce_keys: tuple[str, ...] = ("param", "step")
+    """Keys over which requests are merged into a single multi-valued pproc request, unless `pproc_coalesce_requests` is unset."""
+
     @property
     def default_request_keys(self) -> dict[str, Any]:
         return {
@@ -113,17 +133,29 @@ class PProcProduct(Product):
         Graph
             PPROC graph
         """
-        total_graph = Graph([])
+        builder = GraphBuilder()
         if not isinstance(request, list):
             request = [request]
 
         for key in sources:
             sources[key] = ppAction(sources[key].nodes)
 
-        for req in request:
-            total_graph += from_request(req, self._pproc_schema_path, self.action_kwargs, **sources).graph()
-
-        return deduplicate_nodes(total_graph)
+        if settings.pproc_coalesce_requests:
+            coalesced = coalesce_requests(request, self.coalesce_keys)
+        else:
+            coalesced = [(req, [req]) for req in request]
+
+        for merged, originals in coalesced:
+            if len(originals) > 1:
+                try:
+                    builder.add(from_request(merged, self._pproc_schema_path, self.action_kwargs, **sources))
+                    continue
+                except Exception as e:
+                    LOG.warning(f"Could not merge {len(originals)} pproc requests, deriving them separately: {e}")
+            for req in originals:
+                builder.add(from_request(req, self._pproc_schema_path, self.action_kwargs, **sources))
+
+        return builder.graph()
 
     def to_graph(self, product_spec: dict[str, Any], model: Model, source: fluent.Action):
         """
@@ -44,7 +44,10 @@ class Product(ABC):
     @property
     @abstractmethod
     def qube(self) -> "Qube":
-        """Requirements of the product to be used with a Model Qube."""
+        """Requirements of the product to be used with a Model Qube.
+
+        Subclasses compute it once as a `cached_property`, it is shared and must not be modified.
+        """
         pass
 
     @property
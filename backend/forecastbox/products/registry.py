@@ -14,10 +14,21 @@ Registry of products
 from dataclasses import dataclass, field
 from typing import Callable, Type
 
+from forecastbox.cache import LRUCache
+from forecastbox.models import Model
+
 from .product import Product
 
 PRODUCTS: dict[str, "CategoryRegistry"] = {}
 
+_version = 0
+"""Number of changes to the registry, so anything derived from it is recomputed after a change."""
+
+
+def _changed() -> None:
+    global _version
+    _version += 1
+
 
 @dataclass
 class Category:
@@ -52,6 +63,8 @@ class CategoryRegistry:
         """
         PRODUCTS[category] = self
         self._products: dict[str, Type[Product]] = {}
+        self._instances: dict[str, Product] = {}
+        _changed()
 
         self._description = description
         self._title = title or category
@@ -78,6 +91,8 @@ class CategoryRegistry:
 
         def decorator(func: type[Product]) -> type[Product]:
             self._products[product] = func
+            self._instances.pop(product, None)
+            _changed()
             return func
 
         return decorator
@@ -92,6 +107,12 @@ class CategoryRegistry:
     def __contains__(self, key: str) -> bool:
         return key in self._products
 
+    def instance(self, key: str) -> Product:
+        """Get the shared instance of a product, creating it on first use."""
+        if key not in self._instances:
+            self._instances[key] = self._products[key]()
+        return self._instances[key]
+
 
 def get_categories() -> dict[str, Category]:
     """Get category information."""
@@ -104,5 +125,29 @@ def get_product_list(category: str) -> list[str]:
 
 
 def get_product(category: str, product: str) -> Product:
-    """Get a product."""
-    return PRODUCTS[category][product]()
+    """Get a product.
+
+    Products are shared singletons, so their Qubes are only computed once.
+    """
+    return PRODUCTS[category].instance(product)
+
+
+VALID_PRODUCTS: LRUCache[tuple[str, tuple[int, int], bool, int], dict[str, list[str]]] = LRUCache("valid_products", max_entries=64)
+"""Products valid with a model, by checkpoint path, checkpoint identity, whether it is deterministic and registry version."""
+
+
+def get_valid_products(model: Model) -> dict[str, list[str]]:
+    """Get the products of each category which are valid with a model.
+
+    Validity only depends on the checkpoint and whether the model has a single ensemble member,
+    so it is computed once for each and cached.
+    """
+    key = (str(model.checkpoint_path), model.index.checkpoint_identity, model.ensemble_members == 1, _version)
+
+    def validate() -> dict[str, list[str]]:
+        return {
+            category: [product for product in registry.products if get_product(category, product).validate_intersection(model)]
+            for category, registry in PRODUCTS.items()
+        }
+
+    return VALID_PRODUCTS.get_or_create(key, validate)
@@ -8,6 +8,7 @@
 # nor does it submit to any jurisdiction.
 
 import warnings
+from functools import cached_property
 
 from forecastbox.products.registry import CategoryRegistry
 from forecastbox.products.ensemble import ensemble_registry, BaseEnsembleProduct
@@ -111,7 +112,7 @@ class MapProduct(GenericTemporalProduct):
             "domain": self.domains,
         }
 
-    @property
+    @cached_property
     def qube(self):
         return self.make_generic_qube(domain=self.domains)
 
@@ -204,7 +205,7 @@ class GribProduct(GenericTemporalProduct):
         "step": True,
     }
 
-    @property
+    @cached_property
     def qube(self):
         return self.make_generic_qube(format=OUTPUT_TYPES)
 
@@ -224,7 +225,7 @@ class DeaccumulatedProduct(GenericTemporalProduct):
         "step": True,
     }
 
-    @property
+    @cached_property
     def qube(self):
         return self.make_generic_qube()
 
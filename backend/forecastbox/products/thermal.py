@@ -9,6 +9,7 @@
 
 from qubed import Qube
 import importlib.util
+from functools import cached_property
 
 from forecastbox.models import Model
 
@@ -35,7 +36,7 @@ class BaseThermalIndex(Product):
         "step": True,
     }
 
-    @property
+    @cached_property
     def qube(self):
         return Qube.from_datacube({"param": "*"})
 
@@ -0,0 +1,178 @@
+# (C) Copyright 2024- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+"""
+On-disk store of encoded job results
+
+Results are kept under `API_SETTINGS.data_path` as
+`results/{job_id}/{dataset_id}/{filename}`, with one file per encoding,
+named by the encoder which produced it.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+from urllib.parse import quote
+
+from forecastbox.encoders import ENCODERS, get_encoder
+from forecastbox.settings import API_SETTINGS
+
+LOG = logging.getLogger(__name__)
+
+
+@dataclass
+class StoredResult:
+    """An encoded result on disk"""
+
+    path: Path
+    media_type: str
+
+    @property
+    def etag(self) -> str:
+        """Entity tag, stable for as long as the file is unchanged."""
+        stat = self.path.stat()
+        return '"' + hashlib.md5(f"{self.path.name}-{stat.st_mtime_ns}-{stat.st_size}".encode()).hexdigest() + '"'
+
+
+ENTITY_TAG = re.compile(r'\*|(?:W/)?"[^"]*"')
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Whether an If-None-Match header matches `etag`.
+
+    The header is a list of entity tags or `*`, compared weakly as for
+    If-None-Match, so that `W/"x"` matches `"x"`.
+    """
+    if not if_none_match:
+        return False
+    tags = {tag.removeprefix("W/") for tag in ENTITY_TAG.findall(if_none_match)}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def results_dir() -> Path:
+    return Path(API_SETTINGS.data_path) / "results"
+
+
+def job_dir(job_id: str) -> Path:
+    return results_dir() / quote(job_id, safe="")
+
+
+def dataset_dir(job_id: str, dataset_id: str) -> Path:
+    return job_dir(job_id) / quote(dataset_id, safe="")
+
+
+def find(job_id: str, dataset_id: str, options: dict[str, Any] | None = None) -> list[StoredResult]:
+    """Find the stored encodings of a result matching `options`, in order of encoder preference."""
+    directory = dataset_dir(job_id, dataset_id)
+    if not directory.is_dir():
+        return []
+
+    options = options or {}
+    found = []
+    for path in directory.iterdir():
+        encoder = get_encoder(path.name, options)
+        if encoder is not None:
+            found.append((ENCODERS.index(encoder), StoredResult(path, encoder.media_type)))
+    return [stored for _, stored in sorted(found, key=lambda x: x[0])]
+
+
+def exists(job_id: str, dataset_id: str) -> bool:
+    """Whether any encoding of a result is stored."""
+    directory = dataset_dir(job_id, dataset_id)
+    return directory.is_dir() and any(not path.name.startswith(".") for path in directory.iterdir())
+
+
+def store(job_id: str, dataset_id: str, filename: str, chunks: Iterable[bytes | memoryview]) -> Path:
+    """Store an encoded result, written chunk by chunk.
+
+    The file is written under a temporary name and moved into place once complete,
+    so a partially written result is never served.
+    """
+    directory = dataset_dir(job_id, dataset_id)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / filename
+
+    with tempfile.NamedTemporaryFile(dir=directory, prefix=".", delete=False) as f:
+        try:
+            for chunk in chunks:
+                f.write(chunk)
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, path)
+    return path
+
+
+def delete(job_id: str) -> None:
+    """Delete all stored results of a job."""
+    shutil.rmtree(job_dir(job_id), ignore_errors=True)
+
+
+def clear() -> None:
+    """Delete all stored results."""
+    shutil.rmtree(results_dir(), ignore_errors=True)
+
+
+class ArchiveSink(io.RawIOBase):
+    """Unseekable file object collecting what a `zipfile.ZipFile` writes, to be drained into a response.
+
+    As the sink is unseekable, the archive is written in a single pass with data descriptors.
+    """
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        """Get and forget everything written so far."""
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def open_archive() -> tuple[zipfile.ZipFile, ArchiveSink]:
+    """Open an uncompressed zip archive writing into a sink."""
+    sink = ArchiveSink()
+    return zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED), sink
+
+
+def iter_archive_entry(
+    archive: zipfile.ZipFile, sink: ArchiveSink, name: str, content: Path | bytes, chunk_size: int = 1024**2
+) -> Iterator[bytes]:
+    """Add a file or bytes to an archive, yielding the archive bytes as they are produced."""
+    with archive.open(name, "w", force_zip64=True) as dest:
+        if isinstance(content, bytes):
+            dest.write(content)
+        else:
+            with open(content, "rb") as src:
+                while chunk := src.read(chunk_size):
+                    dest.write(chunk)
+                    yield sink.drain()
+    yield sink.drain()
+
+
+def iter_archive_end(archive: zipfile.ZipFile, sink: ArchiveSink) -> Iterator[bytes]:
+    """Close an archive, yielding its central directory."""
+    archive.close()
+    yield sink.drain()
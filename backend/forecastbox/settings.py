@@ -7,6 +7,7 @@
 # granted to it by virtue of its status as an intergovernmental organisation
 # nor does it submit to any jurisdiction.
 
+from pydantic import AliasChoices, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -27,6 +28,8 @@ class FIABSettings(BaseSettingsModel):
 
     pproc_schema_dir: str | None = None
     """Path to the directory containing the PPROC schema files."""
+    pproc_coalesce_requests: bool = True
+    """Whether to merge pproc requests differing only in param or step into one multi-valued request."""
 
 
 class APISettings(BaseSettingsModel):
@@ -36,6 +39,46 @@ class APISettings(BaseSettingsModel):
     """URL to the model repository."""
     api_url: str = "http://localhost:8000"
     """Base URL for the API."""
+    offline: bool = Field(False, validation_alias=AliasChoices("offline", "fiab_offline"))
+    """Whether to run without contacting the model repository, as with `fiab.sh --offline`. Set by `FIAB_OFFLINE`."""
+    manifest_ttl: float = 300.0
+    """Seconds after which the cached model repository manifest is refreshed."""
+    progress_poll_interval: float = 1.0
+    """Interval in seconds between progress polls of Cascade for the job stream."""
+    progress_stream_max_pending: int = 1000
+    """Maximum number of jobs with progress events pending for a single stream subscriber."""
+    graph_cache_size: int = 32
+    """Maximum number of compiled graphs kept in memory."""
+    graph_cache_on_disk: bool = False
+    """Whether to also keep compiled graphs on disk under `data_path`."""
+    graph_build_workers: int = 4
+    """Number of threads building product graphs concurrently."""
+    result_cache_max_bytes: int = 512 * 1024**2
+    """Maximum total size in bytes of job results kept in memory."""
+    result_cache_ttl: float | None = 3600.0
+    """Seconds after which a job result kept in memory expires, or None to never expire."""
+    bundle_concurrency: int = 4
+    """Maximum number of results of a job retrieved concurrently for a bundle download."""
+    model_download_chunk_size: int = 1024**2
+    """Size in bytes of the chunks model checkpoints are downloaded in."""
+    model_download_connections: int = 4
+    """Number of concurrent connections a model checkpoint is downloaded over, if the repository supports range requests."""
+    download_progress_interval: float = 2.0
+    """Maximum interval in seconds between writes of model download progress to the database."""
+    download_progress_step: float = 5.0
+    """Progress in percent after which model download progress is written to the database."""
+    model_download_workers: int = 2
+    """Maximum number of model checkpoints downloaded concurrently, further downloads are queued."""
+    model_download_retries: int = 3
+    """Number of times a failed model download is retried."""
+    model_download_backoff: float = 5.0
+    """Seconds before the first retry of a failed model download, doubling on each further retry."""
+    model_download_bandwidth: int | None = None
+    """Maximum aggregate bandwidth in bytes per second of model downloads, or None for no limit."""
+    model_qube_cache_size: int = 128
+    """Maximum number of model Qubes kept in memory, one per model and set of assumptions."""
+    configuration_cache_size: int = 64
+    """Maximum number of product configuration solvers kept in memory, one per product and model specification."""
 
 
 class CascadeSettings(BaseSettingsModel):
@@ -45,6 +88,10 @@ class CascadeSettings(BaseSettingsModel):
     """Number of workers per host for Cascade."""
     cascade_url: str = "tcp://localhost:8067"
     """Base URL for the Cascade API."""
+    gateway_timeout_ms: int = 1000
+    """Default timeout in milliseconds for requests to the Cascade gateway."""
+    gateway_pool_size: int = 8
+    """Maximum number of concurrently open connections to the Cascade gateway."""
     LOG_COLLECTION_MAX_SIZE: int = 1000
 
     VENV_TEMP_DIR: str = "/tmp"
@@ -0,0 +1,160 @@
+# (C) Copyright 2024- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+"""Tests of resumable checkpoint downloads against a local HTTP server."""
+
+import asyncio
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from forecastbox.models.download import download
+
+CONTENT = os.urandom(256 * 1024 + 123)
+
+
+class Server(ThreadingHTTPServer):
+    """HTTP server of `CONTENT` at `/model.ckpt`, with its checksum at `/model.ckpt.sha256`."""
+
+    daemon_threads = True
+
+    def __init__(self, ranged: bool = True, checksum: str | None = None):
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.ranged = ranged
+        self.checksum = checksum or hashlib.sha256(CONTENT).hexdigest()
+        self.interrupt_after: int | None = None
+        """Number of bytes after which the next response is cut off."""
+        self.ranges: list[str | None] = []
+        """Range header of each request of the content."""
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/model.ckpt"
+
+
+class Handler(BaseHTTPRequestHandler):
+    server: Server
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.send_content(body=False)
+
+    def do_GET(self):
+        if self.path.endswith(".sha256"):
+            body = f"{self.server.checksum}  model.ckpt\n".encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.server.ranges.append(self.headers.get("Range"))
+        self.send_content(body=True)
+
+    def send_content(self, body: bool):
+        start, end = 0, len(CONTENT)
+        header = self.headers.get("Range")
+        if self.server.ranged and header and body:
+            first, last = header.removeprefix("bytes=").split("-")
+            start, end = int(first), int(last) + 1
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end - 1}/{len(CONTENT)}")
+        else:
+            self.send_response(200)
+        if self.server.ranged:
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(end - start))
+        self.end_headers()
+        if not body:
+            return
+
+        interrupt_after, self.server.interrupt_after = self.server.interrupt_after, None
+        if interrupt_after is not None:
+            self.wfile.write(CONTENT[start : min(end, start + interrupt_after)])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(CONTENT[start:end])
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(**kwargs) -> Server:
+        server = Server(**kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_download(serve, tmp_path):
+    server = serve()
+    destination = tmp_path / "model.ckpt"
+
+    asyncio.run(download(server.url, destination, chunk_size=4096, connections=4))
+
+    assert destination.read_bytes() == CONTENT
+    assert len(server.ranges) == 4
+    assert not (tmp_path / "model.ckpt.part").exists()
+    assert not (tmp_path / "model.ckpt.part.json").exists()
+
+
+def test_download_resumes_after_interruption(serve, tmp_path):
+    server = serve()
+    destination = tmp_path / "model.ckpt"
+
+    server.interrupt_after = 10_000
+    with pytest.raises(httpx.HTTPError):
+        asyncio.run(download(server.url, destination, chunk_size=1024, connections=1))
+    assert not destination.exists()
+    assert (tmp_path / "model.ckpt.part.json").exists()
+
+    server.ranges.clear()
+    asyncio.run(download(server.url, destination, chunk_size=1024, connections=1))
+
+    assert destination.read_bytes() == CONTENT
+    # The second download only requests what was missing
+    assert len(server.ranges) == 1
+    resumed_at = int(server.ranges[0].removeprefix("bytes=").split("-")[0])
+    assert 0 < resumed_at <= 10_000
+
+
+def test_download_without_range_support(serve, tmp_path):
+    server = serve(ranged=False)
+    destination = tmp_path / "model.ckpt"
+
+    asyncio.run(download(server.url, destination, chunk_size=4096, connections=4))
+
+    assert destination.read_bytes() == CONTENT
+    assert server.ranges == [None]
+    assert not (tmp_path / "model.ckpt.part.json").exists()
+
+
+def test_download_checksum_mismatch(serve, tmp_path):
+    server = serve(checksum="0" * 64)
+    destination = tmp_path / "model.ckpt"
+
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        asyncio.run(download(server.url, destination, chunk_size=4096, connections=2))
+
+    assert not destination.exists()
+    assert not (tmp_path / "model.ckpt.part").exists()
+    assert not (tmp_path / "model.ckpt.part.json").exists()
@@ -0,0 +1,69 @@
+# (C) Copyright 2024- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+"""Tests of incremental graph construction with node deduplication."""
+
+from dataclasses import dataclass
+
+import pytest
+from earthkit.workflows.graph import Graph
+from earthkit.workflows.graph.nodes import Node
+
+from forecastbox.graph_builder import GraphBuilder
+
+
+@dataclass
+class Options:
+    """Unhashable payload, equal by its fields."""
+
+    levels: list[int]
+
+
+def build(*graphs: Graph) -> GraphBuilder:
+    builder = GraphBuilder()
+    for graph in graphs:
+        builder.add(graph)
+    return builder
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ({"param": ["2t", "tp"], "step": 6}, {"step": 6, "param": ["2t", "tp"]}),
+        ([{"a": 1}, [2, 3]], [{"a": 1}, [2, 3]]),
+        (Options([500, 850]), Options([500, 850])),
+    ],
+    ids=["dict", "list", "dataclass"],
+)
+def test_equal_unhashable_payloads_are_deduplicated(first, second):
+    source = Node("source", payload="source")
+    builder = build(
+        Graph([Node("sink", payload=first, input=source)]),
+        Graph([Node("sink", payload=second, input=Node("source", payload="source"))]),
+    )
+
+    assert first == second and first is not second
+    assert len(builder) == 2
+    assert len(list(builder.graph().sinks)) == 1
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        ({"param": ["2t", "tp"]}, {"param": ["tp", "2t"]}),
+        ([[]], [("list", ())]),
+        (Options([500]), Options([850])),
+    ],
+    ids=["dict", "nested", "dataclass"],
+)
+def test_unequal_unhashable_payloads_are_kept(first, second):
+    builder = build(Graph([Node("sink", payload=first)]), Graph([Node("sink", payload=second)]))
+
+    assert first != second
+    assert len(builder) == 2
@@ -0,0 +1,84 @@
+# (C) Copyright 2024- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+"""Tests of MARS request coalescing, and that pproc derives the same outputs from coalesced requests."""
+
+import itertools
+import json
+from pathlib import Path
+
+import pytest
+
+from forecastbox.mars import coalesce_requests, request_key
+
+SCHEMA = Path(__file__).parents[1] / "forecastbox" / "products" / "schema" / "default.yaml"
+# As completed by PProcProduct.to_graph, with the class and stream pproc requires
+BASE = {"class": "od", "stream": "enfo", "expver": "0001", "date": "20240101", "time": "0000", "domain": "g", "levtype": "sfc"}
+KEYS = ("param", "step")
+
+
+def test_coalesce_full_grid():
+    requests = [{**BASE, "type": "em", "param": p, "step": s} for p, s in itertools.product([167, 165], ["6", "12", "18"])]
+
+    [(merged, originals)] = coalesce_requests(requests, KEYS)
+
+    assert merged == {**BASE, "type": "em", "param": [167, 165], "step": ["6", "12", "18"]}
+    assert originals == requests
+
+
+def test_coalesce_partial_grid_merges_last_key_only():
+    requests = [{**BASE, "type": "em", "param": 167, "step": s} for s in ["6", "12"]]
+    requests.append({**BASE, "type": "em", "param": 165, "step": "6"})
+
+    coalesced = coalesce_requests(requests, KEYS)
+
+    assert [merged for merged, _ in coalesced] == [
+        {**BASE, "type": "em", "param": 167, "step": ["6", "12"]},
+        {**BASE, "type": "em", "param": 165, "step": "6"},
+    ]
+
+
+def test_coalesce_keeps_other_keys_apart():
+    requests = [{**BASE, "type": t, "param": 167, "step": "6"} for t in ("em", "es")]
+
+    assert [originals for _, originals in coalesce_requests(requests, KEYS)] == [[requests[0]], [requests[1]]]
+
+
+def test_request_key_ignores_order_and_type():
+    assert request_key({**BASE, "param": [167, 165], "step": ["6"]}, KEYS) == request_key(
+        {**BASE, "param": ["165", "167"], "step": 6}, KEYS
+    )
+    assert request_key({**BASE, "param": 167, "step": "6"}, KEYS) != request_key({**BASE, "param": 167, "step": "12"}, KEYS)
+
+
+def expanded(config, method: str) -> set[str]:
+    from pproc.config.utils import expand
+
+    return {json.dumps(request, sort_keys=True, default=str) for request in expand(list(getattr(config, method)()))}
+
+
+@pytest.mark.parametrize(
+    "requests",
+    [
+        [{**BASE, "type": "em", "param": p, "step": s} for p, s in itertools.product([167, 165, 166, 228], range(6, 49, 6))],
+        [{**BASE, "type": "ep", "param": p, "step": "0-24"} for p in (131060, 131061, 131062)],
+        [{**BASE, "type": "ep", "param": p, "step": s} for p, s in itertools.product([131068, 131069], [24, 48])],
+    ],
+    ids=["ensemble-stats-grid", "thresholds", "thresholds-steps"],
+)
+def test_coalesced_configs_match(requests):
+    factory = pytest.importorskip("pproc.config.factory")
+    schema = pytest.importorskip("pproc.schema.schema").Schema.from_file(str(SCHEMA))
+
+    [(merged, _)] = coalesce_requests(requests, KEYS)
+    coalesced = factory.ConfigFactory.from_outputs(schema, [merged])
+    separate = [factory.ConfigFactory.from_outputs(schema, [request]) for request in requests]
+
+    for method in ("out_mars", "in_mars"):
+        assert expanded(coalesced, method) == set().union(*(expanded(config, method) for config in separate))
@@ -0,0 +1,69 @@
+# (C) Copyright 2024- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+"""Tests of keyset pagination of job records, including records without a creation time."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from forecastbox.api.paging import JOB_SORT, decode_cursor, encode_cursor
+
+mongomock = pytest.importorskip("mongomock")
+
+
+@pytest.fixture
+def job_records():
+    collection = mongomock.MongoClient().db.job_records
+    start = datetime(2025, 1, 1)
+    records = [{"_id": ObjectId(), "job_id": f"job-{i}", "created_at": start + timedelta(minutes=i // 2)} for i in range(7)]
+    # Records from before the creation time was recorded
+    records += [{"_id": ObjectId(), "job_id": f"legacy-{i}"} for i in range(3)]
+    collection.insert_many(records)
+    return collection
+
+
+def list_pages(collection, limit: int) -> list[list[str]]:
+    """List the job ids page by page, as /job/status does."""
+    pages, cursor = [], None
+    while True:
+        query = decode_cursor(cursor) if cursor else {}
+        records = list(collection.find(query).sort(JOB_SORT).limit(limit + 1))
+        pages.append([record["job_id"] for record in records[:limit]])
+        if len(records) <= limit:
+            return pages
+        cursor = encode_cursor(records[limit - 1])
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 7, 10])
+def test_pages_list_every_job_newest_first(job_records, limit):
+    pages = list_pages(job_records, limit)
+
+    assert [job_id for page in pages for job_id in page] == [
+        *(record["job_id"] for record in job_records.find({"created_at": {"$ne": None}}).sort(JOB_SORT)),
+        "legacy-2",
+        "legacy-1",
+        "legacy-0",
+    ]
+    assert all(len(page) == limit for page in pages[:-1])
+
+
+def test_cursor_of_legacy_record(job_records):
+    legacy = job_records.find_one({"job_id": "legacy-1"})
+
+    assert [record["job_id"] for record in job_records.find(decode_cursor(encode_cursor(legacy))).sort(JOB_SORT)] == ["legacy-0"]
+
+
+def test_invalid_cursor():
+    from fastapi import HTTPException
+
+    with pytest.raises(HTTPException) as e:
+        decode_cursor("not a cursor")
+    assert e.value.status_code == 400
@@ -0,0 +1,77 @@
+# (C) Copyright 2024- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+"""Tests that coalesced pproc requests build the same graph outputs as separate requests."""
+
+import logging
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+pytest.importorskip("earthkit.workflows.plugins.pproc")
+
+from earthkit.workflows import fluent  # noqa: E402
+from earthkit.workflows.plugins.anemoi.fluent import ENSEMBLE_DIMENSION_NAME  # noqa: E402
+
+from forecastbox.products import pproc  # noqa: E402
+from forecastbox.products.ensemble.ens_stats import ENSMS  # noqa: E402
+from forecastbox.products.ensemble.threshold import DefinedThresholdProbability  # noqa: E402
+from forecastbox.mars import coalesce_requests  # noqa: E402
+
+MODEL = SimpleNamespace(date="20240101", time="0000")
+PARAMS = ["2t", "10u", "10v", "tp"]
+STEPS = [0, 6, 12, 18, 24]
+
+
+def field(*index):
+    """Stand in for a model output field."""
+
+
+def model_source(members: int = 2) -> fluent.Action:
+    shape = (1, members, len(PARAMS), len(STEPS))
+    payloads = np.empty(shape, dtype=object)
+    for index in np.ndindex(shape):
+        payloads[index] = fluent.Payload(field, index)
+    return fluent.from_source(
+        payloads,
+        dims=["date", ENSEMBLE_DIMENSION_NAME, "param", "step"],
+        coords={"date": ["20240101"], ENSEMBLE_DIMENSION_NAME: list(range(members)), "param": PARAMS, "step": STEPS},
+    )
+
+
+def sinks(product, product_spec: dict, coalesce: bool, monkeypatch) -> set[str]:
+    monkeypatch.setattr(pproc.settings, "pproc_coalesce_requests", coalesce)
+    graph = product.to_graph(dict(product_spec), MODEL, model_source())
+    return {node.name for node in graph.sinks}
+
+
+@pytest.mark.parametrize(
+    "product, product_spec",
+    [
+        (ENSMS(), {"param": ["2t", "10u", "10v"], "step": ["6", "12", "18", "24"], "levtype": "sfc"}),
+        (
+            DefinedThresholdProbability(),
+            {"param": ["tp"], "threshold": ["0.001", "0.005", "0.01"], "operator": ">=", "step": "24", "levtype": "sfc"},
+        ),
+    ],
+    ids=["ensemble-stats-grid", "threshold-multi-request"],
+)
+def test_coalesced_sinks_match(product, product_spec, monkeypatch, caplog):
+    requests = product.mars_request(dict(product_spec))
+    assert len(coalesce_requests(requests, product.coalesce_keys)) < len(requests)
+
+    separate = sinks(product, product_spec, False, monkeypatch)
+    with caplog.at_level(logging.WARNING, logger=pproc.__name__):
+        merged = sinks(product, product_spec, True, monkeypatch)
+    # The merged request must be accepted by pproc rather than derived separately
+    assert "Could not merge" not in caplog.text
+
+    assert len(merged) == len(separate)
+    assert merged == separate
@@ -0,0 +1,32 @@
+# (C) Copyright 2024- ECMWF.
+#
+# This software is licensed under the terms of the Apache Licence Version 2.0
+# which can be obtained at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# In applying this licence, ECMWF does not waive the privileges and immunities
+# granted to it by virtue of its status as an intergovernmental organisation
+# nor does it submit to any jurisdiction.
+
+"""Tests of conditional requests of stored results."""
+
+import pytest
+
+from forecastbox.results import etag_matches
+
+ETAG = '"0123abcd"'
+
+
+@pytest.mark.parametrize(
+    "if_none_match",
+    ['"0123abcd"', 'W/"0123abcd"', '"ffff", "0123abcd"', '"ffff",W/"0123abcd" , "eeee"', "*"],
+)
+def test_etag_matches(if_none_match):
+    assert etag_matches(if_none_match, ETAG)
+
+
+@pytest.mark.parametrize(
+    "if_none_match",
+    [None, "", '"0123"', '"0123abcd0"', "0123abcd", '"x0123abcdx"', '"ffff", "0123ab"', 'W/"0123abc"'],
+)
+def test_etag_does_not_match(if_none_match):
+    assert not etag_matches(if_none_match, ETAG)
@@ -28,31 +28,9 @@ import { ExecutionSpecification } from '../../components/interface';
 import Cart from './../../components/products/cart';
 
 
-function OutputCells({ id, dataset, progress }: { id: string; dataset: string, progress: string | null }) {
-    const [isAvailable, setIsAvailable] = useState<boolean>(false);
-    const api = useApi();
+function OutputCells({ id, dataset, progress, available }: { id: string; dataset: string, progress: string | null, available: string[] }) {
+    const isAvailable = progress === "100.00" || available.includes(dataset);
 
-    useEffect(() => {
-        const checkAvailability = async () => {
-            try {
-                const response = await api.get(`/v1/job/${id}/${dataset}/available`);
-                if (response.status !== 200) {
-                    throw new Error(`HTTP error! Status: ${response.statusText}`);
-                }
-                const data = await response.data;
-                setIsAvailable(data.available);
-            } catch (error) {
-                console.error('Error checking availability:', error);
-            }
-        };
-
-        checkAvailability();
-        console.log(progress)
-        if (progress === "100.00") {
-            setIsAvailable(true); // Set to true if progress is 100
-        }
-    }, [id, dataset, progress]);
-    
     return (
         <>
         <Table.Td>
@@ -72,13 +50,19 @@ export type ProgressResponse = {
     error: string;
   }
 
+type ProgressEvent = ProgressResponse & {
+    job_id: string;
+    available: string[];
+  }
+
 const ProgressPage = () => {
     let {id} = useParams();
 
     const [progress, setProgress] = useState<ProgressResponse>({} as ProgressResponse);
     const [outputs, setOutputs] = useState<DatasetId[] | null>([]);
-    
-    const progressIntervalRef = useRef<NodeJS.Timeout | null>(null);
+    const [available, setAvailable] = useState<string[]>([]);
+
+    const eventSourceRef = useRef<EventSource | null>(null);
     const api = useApi();
 
     const [showMoreInfo, setShowMoreInfo] = useState(false);
@@ -114,6 +98,13 @@ const ProgressPage = () => {
         }
     }
     
+    const closeStream = () => {
+        if (eventSourceRef.current) {
+            eventSourceRef.current.close();
+            eventSourceRef.current = null;
+        }
+    };
+
     const fetchProgress = async () => {
         try {
             const response = await api.get(`/v1/job/${id}/status`);
@@ -121,16 +112,10 @@ const ProgressPage = () => {
             setProgress(data);
     
             if (data.progress === "100.00" || data.status === "completed") {
-                if (progressIntervalRef.current) {
-                    clearInterval(progressIntervalRef.current); // Stop fetching if progress is 100
-                    progressIntervalRef.current = null;
-                }
+                closeStream(); // Stop streaming if progress is 100
             }
         } catch (error) {
-            if (progressIntervalRef.current) {
-                clearInterval(progressIntervalRef.current);
-                progressIntervalRef.current = null;
-            }
+            closeStream();
             showNotification({
                 id: `error-progress-${id}`,
                 title: 'Error',
@@ -139,6 +124,22 @@ const ProgressPage = () => {
             });
         }
     };
+
+    const streamProgress = () => {
+        closeStream();
+        const source = new EventSource(`/api/v1/job/stream?job_id=${id}`);
+        source.addEventListener("progress", (e) => {
+            const data: ProgressEvent = JSON.parse(e.data);
+            setProgress({progress: data.progress, status: data.status, error: data.error});
+            setAvailable(data.available);
+
+            if (data.progress === "100.00" || !["running", "submitted"].includes(data.status)) {
+                closeStream();
+                fetchProgress();
+            }
+        });
+        eventSourceRef.current = source;
+    };
     
     const fetchOutputs = async () => {
         try {
@@ -156,20 +157,13 @@ const ProgressPage = () => {
     };
     
     useEffect(() => {
-        // Start the interval and store its ID in the ref
-        progressIntervalRef.current = setInterval(() => {
-            fetchProgress();
-        }, 5000);
+        // Progress and output availability are pushed by the server
+        streamProgress();
         fetchProgress(); // Initial fetch
         fetchOutputs(); // Initial fetch
 
-        // Cleanup function to clear the interval when the component unmounts or `id` changes
-        return () => {
-            if (progressIntervalRef.current) {
-                clearInterval(progressIntervalRef.current);
-                progressIntervalRef.current = null;
-            }
-        };
+        // Cleanup function to close the stream when the component unmounts or `id` changes
+        return closeStream;
     }, [id]);
 
     return (
@@ -240,7 +234,7 @@ const ProgressPage = () => {
                     <>
                     {outputs.map((dataset: DatasetId, index: number) => (
                         <Table.Tr key={index}>
-                            <OutputCells id={id as string} dataset={dataset} progress={progress.progress}/>
+                            <OutputCells id={id as string} dataset={dataset} progress={progress.progress} available={available}/>
                         </Table.Tr>
                 ))}
                 </>
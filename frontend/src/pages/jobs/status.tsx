@@ -35,8 +35,12 @@ export type ProgressResponse = {
 
 export type StatusResponse = {
   progresses: Record<string, ProgressResponse>;
+  next_cursor?: string | null;
 };
 
+const PAGE_SIZE = 25;
+const ACTIVE_STATUSES = ["running", "submitted"];
+
 
 const HomePage = () => {
 
@@ -46,11 +50,17 @@ const HomePage = () => {
   const [working, setWorking] = useState(false);
   const [uploading, setUploading] = useState(false);
   const api = useApi();
-  const progressIntervalRef = useRef<null>(null);
+  const eventSourceRef = useRef<EventSource | null>(null);
+
+  // Cursors of the pages visited, the last being the current page, null for the first page
+  const [cursors, setCursors] = useState<(string | null)[]>([null]);
+  const cursorRef = useRef<string | null>(null);
 
-  const getStatus = async () => {
+  const getStatus = async (cursor: string | null = cursorRef.current) => {
     try {
-      const response = await api.get('/v1/job/status');
+      const response = await api.get('/v1/job/status', {
+        params: { limit: PAGE_SIZE, ...(cursor ? { cursor } : {}) },
+      });
 
       const data: StatusResponse = await response.data;
       setJobs(data);
@@ -103,7 +113,7 @@ const HomePage = () => {
       setLoading(false);
       setWorking(false);
     }
-    getStatus();
+    goToPage([null]);
   };
 
   const downloadJob = async (jobId: string) => {
@@ -246,6 +256,26 @@ const HomePage = () => {
     getStatus();
   };
 
+  const goToPage = (pageCursors: (string | null)[]) => {
+    const cursor = pageCursors[pageCursors.length - 1];
+    cursorRef.current = cursor;
+    setCursors(pageCursors);
+    setLoading(true);
+    getStatus(cursor);
+  };
+
+  const nextPage = () => {
+    if (jobs.next_cursor) {
+      goToPage([...cursors, jobs.next_cursor]);
+    }
+  };
+
+  const previousPage = () => {
+    if (cursors.length > 1) {
+      goToPage(cursors.slice(0, -1));
+    }
+  };
+
   const [showMoreInfo, setShowMoreInfo] = useState(false);
   const [moreInfoSpec, setMoreInfoSpec] = useState({} as ExecutionSpecification);
 
@@ -282,23 +312,49 @@ const HomePage = () => {
 
   }
 
+  const closeStream = () => {
+    if (eventSourceRef.current) {
+      eventSourceRef.current.close();
+      eventSourceRef.current = null;
+    }
+  };
+
   useEffect(() => {
     setLoading(true);
     getStatus();
-      // Start the interval and store its ID in the ref
-      progressIntervalRef.current = setInterval(() => {
-        getStatus();
-    }, 10000);
-
-    // Cleanup function to clear the interval when the component unmounts or `id` changes
-    return () => {
-        if (progressIntervalRef.current) {
-            clearInterval(progressIntervalRef.current);
-            progressIntervalRef.current = null;
-        }
-    };
+    return closeStream;
   }, []);
 
+  // Progress of the active jobs on the page is pushed by the server rather than polled
+  const activeJobs = Object.entries(jobs.progresses || {})
+    .filter(([, progress]) => ACTIVE_STATUSES.includes(String(progress.status)))
+    .map(([jobId]) => jobId)
+    .sort()
+    .join(',');
+
+  useEffect(() => {
+    closeStream();
+    if (!activeJobs) {
+      return;
+    }
+
+    const params = new URLSearchParams();
+    activeJobs.split(',').forEach((jobId) => params.append('job_id', jobId));
+    const source = new EventSource(`/api/v1/job/stream?${params}`);
+    source.addEventListener("progress", (e) => {
+      const data = JSON.parse(e.data);
+      setJobs((current) => ({
+        ...current,
+        progresses: {
+          ...current.progresses,
+          [data.job_id]: { progress: data.progress, status: data.status, error: data.error },
+        },
+      }));
+    });
+    eventSourceRef.current = source;
+    return closeStream;
+  }, [activeJobs]);
+
   const UserButtons = () => {
     return [
       <FileButton key="upload" onChange={handleFileUpload} disabled={uploading}>
@@ -451,6 +507,15 @@ const HomePage = () => {
           </Table.Tbody>
         </Table>
       )}
+      <Group justify='center' mt='md'>
+        <Button variant='default' size='xs' onClick={previousPage} disabled={cursors.length <= 1}>
+          Previous
+        </Button>
+        <span>Page {cursors.length}</span>
+        <Button variant='default' size='xs' onClick={nextPage} disabled={!jobs.next_cursor}>
+          Next
+        </Button>
+      </Group>
     </Container>
     </MainLayout>
   );
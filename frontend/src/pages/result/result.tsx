@@ -19,6 +19,14 @@ import MainLayout from "../../layouts/MainLayout";
 
 import { IconDownload } from "@tabler/icons-react";
 
+const EXTENSIONS: Record<string, string> = {
+    'application/x-grib': '.grib',
+    'application/x-netcdf': '.nc',
+    'application/x-npy': '.npy',
+    'application/octet-stream': '.bin',
+    'image/svg+xml': '.svg',
+};
+
 export default function ResultsPage() {
     let {job_id, dataset_id} = useParams();
     const api = useApi();
@@ -93,7 +101,7 @@ export default function ResultsPage() {
                         <ActionIcon
                             component="a"
                             href={dataLink}
-                            download={`${dataset_id}.pickle`}
+                            download={`${dataset_id}${EXTENSIONS[contentType] ?? '.pickle'}`}
                             size="xxl"
                         >
                             <IconDownload size={'30vh'} />